@@ -0,0 +1,253 @@
+"""Helpers shared by the benchmark scripts: percentiles, a small HTTP client, a server runner and JSON results."""
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / "benchmarks" / "results"
+
+
+def percentiles(values: List[float], scale: float = 1.0) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * scale, 3),
+        "p50": round(pick(0.50) * scale, 3),
+        "p90": round(pick(0.90) * scale, 3),
+        "p99": round(pick(0.99) * scale, 3),
+        "max": round(ordered[-1] * scale, 3),
+    }
+
+
+def request(base_url: str, method: str, path: str, body: Optional[Dict[str, Any]] = None,
+            api_key: Optional[str] = None, timeout: float = 30, parse: bool = True) -> Tuple[int, Any, float]:
+    # Returns (status, parsed body, seconds); status 0 means the request never got a response.
+    # With parse=False the body is returned as raw bytes, which keeps large responses cheap for the load generator.
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if api_key:
+        req.add_header("X-API-Key", api_key)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            raw = response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        raw = e.read()
+        status = e.code
+    except (urllib.error.URLError, OSError) as e:
+        return 0, str(e), time.perf_counter() - started
+    elapsed = time.perf_counter() - started
+    if not parse:
+        return status, raw, elapsed
+    try:
+        return status, json.loads(raw) if raw else None, elapsed
+    except ValueError:
+        return status, raw.decode(errors="replace"), elapsed
+
+
+def conditional_get(base_url: str, path: str, etag: Optional[str] = None, api_key: Optional[str] = None,
+                    timeout: float = 30) -> Tuple[int, Optional[str], int, float]:
+    # GET with If-None-Match; returns (status, ETag, body bytes, seconds), where status 304 means unchanged
+    req = urllib.request.Request(base_url + path, method="GET")
+    if etag:
+        req.add_header("If-None-Match", etag)
+    if api_key:
+        req.add_header("X-API-Key", api_key)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            raw, status, headers = response.read(), response.status, response.headers
+    except urllib.error.HTTPError as e:
+        raw, status, headers = e.read(), e.code, e.headers
+    except (urllib.error.URLError, OSError):
+        return 0, None, 0, time.perf_counter() - started
+    return status, headers.get("ETag"), len(raw), time.perf_counter() - started
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env: Dict[str, str], log_path: Path, workers: int = 1) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    command = [sys.executable, "-m", "uvicorn", "src.api.main:app", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    log_file = open(log_path, "w")
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env={**os.environ, **env}, stdout=log_file, stderr=subprocess.STDOUT)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited during startup; see {log_path}")
+        status, _, _ = request(base_url, "GET", "/health", timeout=2)
+        if status == 200:
+            return process, base_url
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Server did not become healthy; see {log_path}")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class ProcessSampler:
+    # Samples RSS, threads and descendant processes of a server from /proc (Linux only)
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.samples: List[Dict[str, float]] = []
+
+    @staticmethod
+    def _status(pid: int) -> Dict[str, str]:
+        fields = {}
+        with open(f"/proc/{pid}/status") as status_file:
+            for line in status_file:
+                key, _, value = line.partition(":")
+                fields[key] = value.strip()
+        return fields
+
+    def _descendants(self) -> List[int]:
+        children: Dict[int, List[int]] = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as stat_file:
+                    ppid = int(stat_file.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+        found, stack = [], [self.pid]
+        while stack:
+            for child in children.get(stack.pop(), []):
+                found.append(child)
+                stack.append(child)
+        return found
+
+    def sample(self) -> None:
+        try:
+            status = self._status(self.pid)
+        except OSError:
+            return
+        processes = [self.pid, *self._descendants()]
+        rss_kb = 0
+        for pid in processes:
+            try:
+                rss_kb += int(self._status(pid).get("VmRSS", "0 kB").split()[0])
+            except (OSError, ValueError):
+                continue
+        self.samples.append({
+            "time": time.monotonic(),
+            "server_rss_mb": int(status.get("VmRSS", "0 kB").split()[0]) / 1024,
+            "total_rss_mb": rss_kb / 1024,
+            "threads": int(status.get("Threads", 0)),
+            "child_processes": len(processes) - 1,
+        })
+
+    def cpu_seconds(self) -> float:
+        # utime + stime of the server process, from fields 14 and 15 of /proc/<pid>/stat
+        with open(f"/proc/{self.pid}/stat") as stat_file:
+            fields = stat_file.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {}
+        try:
+            peak_server_rss_mb = int(self._status(self.pid).get("VmHWM", "0 kB").split()[0]) / 1024
+        except OSError:
+            peak_server_rss_mb = max(sample["server_rss_mb"] for sample in self.samples)
+        return {
+            "peak_server_rss_mb": round(peak_server_rss_mb, 1),
+            "peak_total_rss_mb": round(max(sample["total_rss_mb"] for sample in self.samples), 1),
+            "peak_threads": max(sample["threads"] for sample in self.samples),
+            "mean_threads": round(sum(sample["threads"] for sample in self.samples) / len(self.samples), 1),
+            "peak_child_processes": max(sample["child_processes"] for sample in self.samples),
+            "samples": len(self.samples),
+        }
+
+
+def parse_histograms(metrics_text: str, name: str, label: str) -> Dict[str, Dict[str, float]]:
+    # Sums <name>_sum/_count per value of one label from Prometheus text output
+    totals: Dict[str, Dict[str, float]] = {}
+    for line in metrics_text.splitlines():
+        for suffix in ("_sum", "_count"):
+            prefix = f"{name}{suffix}{{"
+            if not line.startswith(prefix):
+                continue
+            labels, _, value = line[len(prefix):].partition("} ")
+            label_values = dict(part.split("=", 1) for part in labels.split(",") if "=" in part)
+            key = label_values.get(label, "").strip('"')
+            totals.setdefault(key, {"sum": 0.0, "count": 0.0})[suffix[1:]] += float(value)
+    return {
+        key: {"count": int(value["count"]), "mean_seconds": round(value["sum"] / value["count"], 4) if value["count"] else None}
+        for key, value in totals.items()
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_result(benchmark: str, config: Dict[str, Any], results: Dict[str, Any], output: Optional[str]) -> Path:
+    document = {
+        "benchmark": benchmark,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "git_commit": git_commit(),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()},
+        "config": config,
+        "results": results,
+    }
+    path = Path(output) if output else RESULTS_DIR / f"{benchmark}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2))
+    return path
+
+
+def flatten(values: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline_path: str, results: Dict[str, Any]) -> None:
+    baseline = flatten(json.loads(Path(baseline_path).read_text())["results"])
+    current = flatten(results)
+    print(f"\n{'metric':<55} {'baseline':>12} {'current':>12} {'change':>9}")
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name], current[name]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"{name:<55} {before:>12} {after:>12} {change:>9}")
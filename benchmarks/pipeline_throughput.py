@@ -0,0 +1,266 @@
+"""
+Pipeline throughput benchmark.
+
+Starts the API with the stand-in terraform and gcloud binaries from benchmarks/fakes, registers
+hospitals (and sub-hospitals once their parent completes) at a target rate, and records end-to-end
+latency, server resource usage and SQLite contention. Results are written as JSON.
+
+    python benchmarks/pipeline_throughput.py --hospitals 20 --sub-hospitals 2 --rate 30
+    python benchmarks/pipeline_throughput.py --baseline benchmarks/results/pipeline_throughput-<ts>.json
+"""
+import argparse
+import collections
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from common import (  # noqa: E402
+    REPO_ROOT, ProcessSampler, compare, parse_histograms, percentiles, request, start_server, stop_server, write_result
+)
+
+FAKES_DIR = REPO_ROOT / "benchmarks" / "fakes"
+FINAL_STATUSES = ("completed", "failed")
+LOCK_ERROR_MARKERS = ("database is locked", "database table is locked")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hospitals", type=int, default=10, help="main hospitals to register")
+    parser.add_argument("--sub-hospitals", type=int, default=1, help="sub-hospitals per hospital, registered once it completes")
+    parser.add_argument("--rate", type=float, default=60, help="target registrations per minute (hospitals and sub-hospitals)")
+    parser.add_argument("--timeout", type=float, default=900, help="seconds to wait for every deployment to finish")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="status polling interval per client")
+    parser.add_argument("--max-concurrent-deployments", type=int, default=4)
+    parser.add_argument("--sub-hospital-provisioner", default="terraform", choices=["terraform", "sdk"])
+    parser.add_argument("--disable-admission", action="store_true", help="turn host-load admission control off")
+    parser.add_argument("--create-tables", action="store_true", help="call create-tables after each deployment; gcloud is stubbed but the secret "
+                             "lookup and SQL upload still use the GCP client libraries, so real credentials are needed")
+    # Stand-in latencies, output volume and failure rates
+    parser.add_argument("--init-seconds", type=float, default=2)
+    parser.add_argument("--plan-seconds", type=float, default=3)
+    parser.add_argument("--apply-seconds", type=float, default=20)
+    parser.add_argument("--destroy-seconds", type=float, default=10)
+    parser.add_argument("--resources", type=int, default=12, help="resources per apply")
+    parser.add_argument("--log-lines-per-resource", type=int, default=5)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability a terraform command fails")
+    parser.add_argument("--gcloud-seconds", type=float, default=1)
+    parser.add_argument("--gcloud-failure-rate", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.25, help="relative latency jitter of the stand-ins")
+    parser.add_argument("--workdir", help="keep deployments, database and server log here instead of a temp dir")
+    parser.add_argument("--output", help="result JSON path (default benchmarks/results/pipeline_throughput-<ts>.json)")
+    parser.add_argument("--baseline", help="earlier result JSON to compare against")
+    return parser.parse_args()
+
+
+def server_env(args: argparse.Namespace, workdir: Path) -> Dict[str, str]:
+    (workdir / "terraform-sa.json").write_text('{"type": "service_account", "project_id": "benchmark"}')
+    return {
+        "BASE_DIR": str(workdir),
+        "DATABASE_URL": f"sqlite:///{workdir / 'clients.db'}",
+        "DEPLOYMENTS_BASE_PATH": str(workdir / "deployments"),
+        "TERRAFORM_TEMPLATE_PATH": str(REPO_ROOT / "infrastructure" / "base"),
+        "TERRAFORM_LOCK_DIR": str(workdir / "terraform" / "lock"),
+        "TERRAFORM_PLUGIN_CACHE_DIR": str(workdir / "terraform" / "plugin-cache"),
+        "TEMPLATE_SNAPSHOTS_PATH": str(workdir / "terraform" / "templates"),
+        "TERRAFORM_BINARY": str(FAKES_DIR / "terraform"),
+        "PATH": f"{FAKES_DIR}:{os.environ.get('PATH', '')}",
+        "STATE_BACKEND_TYPE": "local",
+        "MAX_CONCURRENT_DEPLOYMENTS": str(args.max_concurrent_deployments),
+        "SUB_HOSPITAL_PROVISIONER": args.sub_hospital_provisioner,
+        "ADMISSION_CONTROL_ENABLED": "false" if args.disable_admission else "true",
+        "RECONCILE_ON_STARTUP": "false",
+        "API_KEY": "",
+        "FAKE_TF_INIT_SECONDS": str(args.init_seconds),
+        "FAKE_TF_PLAN_SECONDS": str(args.plan_seconds),
+        "FAKE_TF_APPLY_SECONDS": str(args.apply_seconds),
+        "FAKE_TF_DESTROY_SECONDS": str(args.destroy_seconds),
+        "FAKE_TF_RESOURCES": str(args.resources),
+        "FAKE_TF_LOG_LINES_PER_RESOURCE": str(args.log_lines_per_resource),
+        "FAKE_TF_FAILURE_RATE": str(args.failure_rate),
+        "FAKE_TF_JITTER": str(args.jitter),
+        "FAKE_GCLOUD_SECONDS": str(args.gcloud_seconds),
+        "FAKE_GCLOUD_FAILURE_RATE": str(args.gcloud_failure_rate),
+    }
+
+
+class Run:
+    # Registration driver and status poller sharing one table of tracked clients
+    def __init__(self, args: argparse.Namespace, base_url: str):
+        self.args = args
+        self.base_url = base_url
+        self.lock = threading.Lock()
+        self.clients: Dict[str, Dict[str, Any]] = {}
+        self.ready_parents: collections.deque = collections.deque()
+        self.register_latency: List[float] = []
+        self.poll_latency: List[float] = []
+        self.create_tables_latency: List[float] = []
+        self.http_errors: collections.Counter = collections.Counter()
+        self.stop = threading.Event()
+
+    def _register(self, parent_uuid: Optional[str]) -> None:
+        client_uuid = str(uuid.uuid4())
+        payload = {"client_name": f"Bench {client_uuid[:8]}", "client_uuid": client_uuid, "environment": "dev"}
+        path = f"/api/hospitals/{parent_uuid}/sub-hospitals/register" if parent_uuid else "/api/hospitals/register"
+        submitted = time.monotonic()
+        status, body, elapsed = request(self.base_url, "POST", path, payload)
+        self.register_latency.append(elapsed)
+        with self.lock:
+            if status != 201:
+                self.http_errors[f"register:{status}"] += 1
+                self.clients[client_uuid] = {"parent_uuid": parent_uuid, "submitted": submitted, "status": "rejected",
+                                             "finished": time.monotonic(), "error": str(body)[:200]}
+                return
+            self.clients[client_uuid] = {"parent_uuid": parent_uuid, "submitted": submitted, "status": "queued", "finished": None}
+
+    def drive(self) -> None:
+        interval = 60.0 / self.args.rate
+        hospitals_left = self.args.hospitals
+        subs_per_parent = self.args.sub_hospitals
+        next_at = time.monotonic()
+        while not self.stop.is_set():
+            with self.lock:
+                parent_uuid = self.ready_parents.popleft() if self.ready_parents else None
+                waiting_parents = sum(
+                    1 for client in self.clients.values()
+                    if client["parent_uuid"] is None and client["status"] not in FINAL_STATUSES + ("rejected",)
+                )
+            if parent_uuid is None and hospitals_left == 0:
+                if waiting_parents == 0 or subs_per_parent == 0:
+                    return
+                time.sleep(self.args.poll_interval)
+                continue
+            time.sleep(max(0.0, next_at - time.monotonic()))
+            next_at = max(next_at + interval, time.monotonic())
+            if parent_uuid is None:
+                hospitals_left -= 1
+            self._register(parent_uuid)
+
+    def poll(self) -> None:
+        while not self.stop.is_set():
+            with self.lock:
+                pending = [client_uuid for client_uuid, client in self.clients.items() if client["finished"] is None]
+            for client_uuid in pending:
+                status, body, elapsed = request(self.base_url, "GET", f"/api/clients/{client_uuid}/status")
+                self.poll_latency.append(elapsed)
+                if status != 200:
+                    self.http_errors[f"status:{status}"] += 1
+                    continue
+                state = body.get("status")
+                if state not in FINAL_STATUSES:
+                    continue
+                with self.lock:
+                    client = self.clients[client_uuid]
+                    client["status"] = state
+                    client["finished"] = time.monotonic()
+                    client["error"] = body.get("error_message")
+                    if state == "completed" and client["parent_uuid"] is None:
+                        self.ready_parents.extend([client_uuid] * self.args.sub_hospitals)
+                if state == "completed" and self.args.create_tables:
+                    self._create_tables(client_uuid, client["parent_uuid"])
+            time.sleep(self.args.poll_interval)
+
+    def _create_tables(self, client_uuid: str, parent_uuid: Optional[str]) -> None:
+        path = f"/api/hospitals/{client_uuid}/sub-hospitals/create-tables" if parent_uuid else f"/api/hospitals/{client_uuid}/create-tables"
+        status, _, elapsed = request(self.base_url, "POST", path, timeout=600)
+        self.create_tables_latency.append(elapsed)
+        if status != 200:
+            self.http_errors[f"create_tables:{status}"] += 1
+
+    def all_finished(self) -> bool:
+        with self.lock:
+            return all(client["finished"] is not None for client in self.clients.values())
+
+
+def summarize(run: Run, sampler: ProcessSampler, metrics_text: str, log_text: str, started: float) -> Dict[str, Any]:
+    clients = list(run.clients.values())
+    finished = [client for client in clients if client["finished"] is not None and client["status"] != "rejected"]
+    completed = [client for client in finished if client["status"] == "completed"]
+    last_finish = max((client["finished"] for client in finished), default=time.monotonic())
+    wall_minutes = max(last_finish - started, 1e-9) / 60
+
+    def latencies(items, parent: Optional[bool] = None):
+        return [client["finished"] - client["submitted"] for client in items
+                if parent is None or (client["parent_uuid"] is None) == parent]
+
+    return {
+        "submitted": len(clients),
+        "completed": len(completed),
+        "failed": sum(1 for client in finished if client["status"] == "failed"),
+        "rejected": sum(1 for client in clients if client["status"] == "rejected"),
+        "unfinished": sum(1 for client in clients if client["finished"] is None),
+        "wall_seconds": round(last_finish - started, 2),
+        "throughput_per_minute": round(len(completed) / wall_minutes, 2),
+        "e2e_latency_seconds": {
+            "all": percentiles(latencies(completed)),
+            "hospitals": percentiles(latencies(completed, parent=True)),
+            "sub_hospitals": percentiles(latencies(completed, parent=False)),
+        },
+        "register_latency_ms": percentiles(run.register_latency, 1000),
+        "status_latency_ms": percentiles(run.poll_latency, 1000),
+        "create_tables_latency_seconds": percentiles(run.create_tables_latency),
+        "http_errors": dict(run.http_errors),
+        "server": sampler.summary(),
+        "sqlite": {
+            "lock_errors_in_log": sum(log_text.count(marker) for marker in LOCK_ERROR_MARKERS),
+            "register_p99_ms": percentiles(run.register_latency, 1000)["p99"],
+        },
+        "phases": parse_histograms(metrics_text, "provisioning_phase_duration_seconds", "phase"),
+        "db_pool_wait": parse_histograms(metrics_text, "db_pool_wait_seconds", "engine"),
+        "failure_samples": [client.get("error") for client in clients if client["status"] in ("failed", "rejected")][:5],
+    }
+
+
+def main() -> int:
+    args = parse_args()
+    workdir = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="pipeline-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    log_path = workdir / "server.log"
+    server, base_url = start_server(server_env(args, workdir), log_path)
+    sampler = ProcessSampler(server.pid)
+    run = Run(args, base_url)
+
+    def sample_loop():
+        while not run.stop.is_set():
+            sampler.sample()
+            time.sleep(0.5)
+
+    threads = [threading.Thread(target=sample_loop, daemon=True), threading.Thread(target=run.poll, daemon=True)]
+    for thread in threads:
+        thread.start()
+    started = time.monotonic()
+    try:
+        driver = threading.Thread(target=run.drive, daemon=True)
+        driver.start()
+        deadline = started + args.timeout
+        while time.monotonic() < deadline and (driver.is_alive() or not run.all_finished()):
+            time.sleep(0.5)
+        run.stop.set()
+        _, metrics_text, _ = request(base_url, "GET", "/metrics")
+    finally:
+        run.stop.set()
+        stop_server(server)
+
+    results = summarize(run, sampler, metrics_text if isinstance(metrics_text, str) else "", log_path.read_text(errors="replace"), started)
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "workdir")}
+    path = write_result("pipeline_throughput", config, results, args.output)
+    e2e = results["e2e_latency_seconds"]["all"]
+    print(f"{results['completed']}/{results['submitted']} completed, {results['failed']} failed, "
+          f"{results['throughput_per_minute']}/min; e2e p50 {e2e['p50']}s p99 {e2e['p99']}s; "
+          f"peak RSS {results['server'].get('peak_total_rss_mb')} MB, threads {results['server'].get('peak_threads')}")
+    print(f"Results written to {path}")
+    if args.baseline:
+        compare(args.baseline, results)
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0 if results["unfinished"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+from typing import Any, Optional
+from fastapi import Response, status
+from fastapi.responses import ORJSONResponse
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison and may list several tags or "*"
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def set_etag(response: Response, etag: str) -> None:
+    # no-cache: clients may store the body but must revalidate on every poll
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
+
+
+def json_response(content: Any, etag: str) -> Response:
+    # Plain dicts straight to orjson: skips response_model validation and jsonable_encoder
+    response = ORJSONResponse(content)
+    set_etag(response, etag)
+    return response
@@ -1,12 +1,17 @@
 import logging
+import threading
 from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response
 from src.config.settings import settings
-from src.core.database import init_db
+from src.core.database import async_engine, init_db
+from src.core.reconciler import reconciler
+from src.core.workspace_index import workspace_index
+from src.core.metrics import render as render_metrics
+from src.api.middleware.metrics import RequestMetricsMiddleware
 from src.api.routes import hospitals, sub_hospitals, common
 
 logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -16,7 +21,12 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    if settings.reconcile_on_startup:
+        # Inspecting workspaces and remote state can be slow; don't hold up startup
+        threading.Thread(target=reconciler.reconcile, name="reconciler", daemon=True).start()
+    threading.Thread(target=workspace_index.refresh_and_enforce, name="workspace-index", daemon=True).start()
     yield
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -32,7 +42,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
+app.add_middleware(RequestMetricsMiddleware)
 
 try:
     frontend_path = Path("/app/frontend")
@@ -69,6 +81,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
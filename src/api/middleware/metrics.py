@@ -0,0 +1,48 @@
+import time
+from typing import Any, Dict
+from src.core.metrics import REQUEST_DURATION
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestMetricsMiddleware:
+    # Plain ASGI middleware (no body buffering, so streaming responses are unaffected). Requests are
+    # labelled by route template, not raw path, to keep label cardinality bounded by the route table.
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[Any, str] = {}
+
+    def _route_template(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        template = self._routes.get(endpoint)
+        if template is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", []):
+                if getattr(route, "endpoint", None) is endpoint or getattr(route, "app", None) is endpoint:
+                    template = route.path
+                    break
+            self._routes[endpoint] = template or UNMATCHED_ROUTE
+        return self._routes[endpoint]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_DURATION.labels(scope["method"], self._route_template(scope), str(status_code)).observe(
+                time.perf_counter() - started
+            )
@@ -1,60 +1,81 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from src.core.database import get_db, ClientStatusEnum
-from src.core.client_service import ClientService
-from src.core.terraform_service import TerraformService
-from src.models.models import ClientListResponse, ClientStatusResponse
+import asyncio
+import json
+from pathlib import Path
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.database import get_async_db, ClientStatusEnum
+from src.core.async_client_service import AsyncClientService
+from src.core.client_service import LIST_FIELDS, STATUS_FIELDS
+from src.core.async_terraform_service import AsyncTerraformService
+from src.core.admission import admission_controller
+from src.core.workspace_index import workspace_index
+from src.core.background_tasks import task_manager
+from src.core.deletion_jobs import deletion_manager
+from src.core.event_bus import event_bus
+from src.core.state_backend import StateBackend
+from src.models.models import ClientListResponse, ClientStatusResponse, ClientRegistrationResponse, DeletionJobResponse
 from src.api.middleware.auth import verify_api_key
+from src.api.conditional import etag_matches, json_response, not_modified
 from src.config.settings import settings
 
 router = APIRouter(tags=["Common"], dependencies=[Depends(verify_api_key)])
-client_service = ClientService()
-terraform_service = TerraformService()
+client_service = AsyncClientService()
+terraform_service = AsyncTerraformService()
+state_backend = StateBackend()
 
 
 @router.get("/api/hospitals", response_model=ClientListResponse)
-async def list_hospitals(db: Session = Depends(get_db)):
-    clients = client_service.get_all_clients(db)
-    from src.models.models import ClientListItem
-    client_items = [
-        ClientListItem(
-            client_uuid=client.uuid,
-            client_name=client.client_name,
-            status=client_service.map_db_status_to_api_status(client.status),
-            environment=client.environment,
-            region=client.region,
-            parent_uuid=client.parent_uuid,
-            created_at=client.created_at
-        )
-        for client in clients
-    ]
-    return ClientListResponse(clients=client_items, total=len(client_items))
+async def list_hospitals(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated client fields to return, e.g. client_uuid,client_name,status"),
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        selected = client_service.parse_fields(fields, LIST_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    # Read the version first: a write racing the page query can only make the tag stale, never the body
+    etag = client_service.list_etag(await client_service.get_list_version(db), limit, cursor, selected)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    try:
+        client_items, next_cursor = await client_service.list_clients_page(db, limit, cursor, selected)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    total = await client_service.count_clients(db)
+    return json_response({"clients": client_items, "total": total, "next_cursor": next_cursor}, etag)
 
 
 @router.get("/api/clients/{client_uuid}/status", response_model=ClientStatusResponse)
-async def get_client_status(client_uuid: str, db: Session = Depends(get_db)):
-    client = client_service.get_client_by_uuid(db, client_uuid)
-    if not client:
+async def get_client_status(client_uuid: str, fields: Optional[str] = Query(None, description="Comma-separated status fields to return"),
+                            if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    try:
+        selected = client_service.parse_fields(fields, STATUS_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    queue_position = task_manager.queue_position(client_uuid)
+    if if_none_match:
+        updated_at = await client_service.get_client_updated_at(db, client_uuid)
+        if updated_at:
+            etag = client_service.status_etag(client_uuid, updated_at, queue_position, selected)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+    
+    row = await client_service.get_status_fields(db, client_uuid, selected)
+    if not row:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Client not found: {client_uuid}")
     
-    terraform_outputs = client_service.parse_terraform_outputs(client.terraform_outputs)
-    return ClientStatusResponse(
-        client_uuid=client.uuid,
-        client_name=client.client_name,
-        job_id=client.job_id,
-        status=client_service.map_db_status_to_api_status(client.status),
-        environment=client.environment,
-        region=client.region,
-        created_at=client.created_at,
-        updated_at=client.updated_at,
-        error_message=client.error_message,
-        terraform_outputs=terraform_outputs
-    )
+    etag = client_service.status_etag(client_uuid, row.updated_at, queue_position, selected)
+    return json_response(client_service.to_status_fields(row, selected, queue_position), etag)
 
 
 @router.get("/api/clients/{client_uuid}/outputs")
-async def get_client_outputs(client_uuid: str, db: Session = Depends(get_db)):
-    client = client_service.get_client_by_uuid(db, client_uuid)
+async def get_client_outputs(client_uuid: str, db: AsyncSession = Depends(get_async_db)):
+    client = await client_service.get_client_by_uuid(db, client_uuid)
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Client not found: {client_uuid}")
     
@@ -64,51 +85,205 @@ async def get_client_outputs(client_uuid: str, db: Session = Depends(get_db)):
             detail=f"Deployment not completed. Current status: {client.status.value}"
         )
     
-    terraform_outputs = client_service.parse_terraform_outputs(client.terraform_outputs)
+    terraform_outputs = client_service.to_terraform_outputs(client.outputs)
     if not terraform_outputs:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No outputs available for this client")
     
     return terraform_outputs
 
 
-@router.delete("/api/clients/{client_uuid}")
-async def delete_client(client_uuid: str, skip_infrastructure: bool = False, db: Session = Depends(get_db)):
-    client = client_service.get_client_by_uuid(db, client_uuid)
+@router.post("/api/clients/{client_uuid}/outputs:refresh")
+async def refresh_client_outputs(client_uuid: str, db: AsyncSession = Depends(get_async_db)):
+    client = await client_service.get_client_by_uuid(db, client_uuid)
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Client not found: {client_uuid}")
     
-    # If this is a main hospital, delete all sub-hospitals first
-    if not client.parent_uuid:
-        sub_hospitals = client_service.get_sub_hospitals(db, client_uuid)
-        for sub_hospital in sub_hospitals:
-            if not skip_infrastructure:
-                client_service.update_client_status(db, sub_hospital.uuid, ClientStatusEnum.IN_PROGRESS)
-                sub_success, sub_error = terraform_service.destroy_client_infrastructure(sub_hospital.uuid)
-                if not sub_success:
-                    # Log error but continue with deletion
-                    print(f"Warning: Failed to destroy sub-hospital {sub_hospital.uuid} infrastructure: {sub_error}")
-            
-            # Delete sub-hospital record
-            db.delete(sub_hospital)
-            db.commit()
-    
-    if not skip_infrastructure:
-        client_service.update_client_status(db, client_uuid, ClientStatusEnum.IN_PROGRESS)
-        success, error_message = terraform_service.destroy_client_infrastructure(client_uuid)
+    if task_manager.is_running(client_uuid) or task_manager.is_queued(client_uuid):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Deployment is still running for client: {client_uuid}")
+    
+    # Reads the state object from the backend; no terraform process is started
+    success, outputs = await asyncio.to_thread(state_backend.get_outputs, client_uuid)
+    if not success:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=outputs)
+    
+    client = await client_service.update_client_outputs(db, client_uuid, outputs)
+    return client_service.to_terraform_outputs(client.outputs)
+
+
+@router.post("/api/clients/{client_uuid}/redeploy", response_model=ClientRegistrationResponse, status_code=status.HTTP_202_ACCEPTED)
+async def redeploy_client(client_uuid: str, db: AsyncSession = Depends(get_async_db)):
+    client = await client_service.get_client_by_uuid(db, client_uuid)
+    if not client:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Client not found: {client_uuid}")
+    
+    if client.status not in (ClientStatusEnum.COMPLETED, ClientStatusEnum.FAILED) or task_manager.is_running(client_uuid) or task_manager.is_queued(client_uuid):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Client must be 'completed' or 'failed' to redeploy. Current status: {client.status.value}"
+        )
+    
+    await client_service.update_client_status(db, client_uuid, ClientStatusEnum.QUEUED)
+    client_info = client_service.build_client_info(client)
+    if client.parent_uuid:
+        task_manager.deploy_sub_hospital(client_uuid, client.parent_uuid, client_info)
+    else:
+        task_manager.deploy_hospital(client_uuid, client_info)
+    
+    return ClientRegistrationResponse(
+        client_uuid=client.uuid,
+        job_id=client.job_id,
+        status=client_service.map_db_status_to_api_status(ClientStatusEnum.QUEUED),
+        status_url=f"/api/clients/{client.uuid}/status",
+        created_at=client.created_at
+    )
+
+
+async def _log_events(client_uuid: str, log_path: Path):
+    # Tails the log of the running operation and follows it from init to apply/destroy.
+    while log_path is not None:
+        yield f"event: operation\ndata: {log_path.stem}\n\n"
+        with open(log_path, "r", errors="replace") as log_file:
+            pending = ""
+            while True:
+                chunk = log_file.readline()
+                if chunk:
+                    pending += chunk
+                    if pending.endswith("\n"):
+                        yield f"data: {pending.rstrip()}\n\n"
+                        pending = ""
+                    continue
+                if terraform_service.get_active_log(client_uuid) == log_path:
+                    await asyncio.sleep(settings.log_stream_poll_interval)
+                    continue
+                if pending:
+                    yield f"data: {pending.rstrip()}\n\n"
+                break
         
-        if not success:
-            if client.status == ClientStatusEnum.FAILED:
-                skip_infrastructure = True
-            else:
-                client_service.update_client_status(db, client_uuid, ClientStatusEnum.FAILED, f"Infrastructure destruction failed: {error_message}")
-                raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to destroy infrastructure: {error_message}")
+        next_log = None
+        while task_manager.is_running(client_uuid) or task_manager.is_queued(client_uuid):
+            next_log = terraform_service.get_active_log(client_uuid)
+            if next_log is not None and next_log != log_path:
+                break
+            next_log = None
+            await asyncio.sleep(settings.log_stream_poll_interval)
+        log_path = next_log
+    yield "event: end\ndata: {}\n\n"
+
+
+@router.get("/api/clients/{client_uuid}/logs/stream")
+async def stream_client_logs(client_uuid: str, db: AsyncSession = Depends(get_async_db)):
+    client = await client_service.get_client_by_uuid(db, client_uuid)
+    if not client:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Client not found: {client_uuid}")
+    
+    log_path = terraform_service.get_latest_log(client_uuid)
+    if log_path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No logs available for this client")
+    
+    return StreamingResponse(
+        _log_events(client_uuid, log_path),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _format_event(event: dict) -> str:
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def _bus_events(client_uuid: Optional[str], parent_uuid: Optional[str], last_event_id: Optional[str]):
+    # Subscribed inside the generator so the finally below always runs once the stream has started
+    subscription, replay = event_bus.subscribe(client_uuid, parent_uuid, last_event_id)
+    try:
+        yield f"retry: {settings.event_stream_retry_ms}\n\n"
+        if replay is None:
+            # The requested event id is gone (restart or too old): the client should reload its state
+            yield "event: reset\ndata: {}\n\n"
+        else:
+            for event in replay:
+                yield _format_event(event)
+        while not (subscription.overflowed and subscription.queue.empty()):
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), settings.event_heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _format_event(event)
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+@router.get("/api/events")
+async def stream_events(
+    client_uuid: Optional[str] = Query(None, description="Only events for this client"),
+    parent_uuid: Optional[str] = Query(None, description="Only events for this hospital and its sub-hospitals"),
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    return StreamingResponse(
+        _bus_events(client_uuid, parent_uuid, last_event_id_header or last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.delete("/api/clients/{client_uuid}")
+async def delete_client(client_uuid: str, response: Response, skip_infrastructure: bool = False, db: AsyncSession = Depends(get_async_db)):
+    client = await client_service.get_client_by_uuid(db, client_uuid)
+    if not client:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Client not found: {client_uuid}")
+    
+    sub_hospitals = await client_service.get_sub_hospitals(db, client_uuid) if not client.parent_uuid else []
+    targets = [client, *sub_hospitals]
+    for target in targets:
+        active_job = deletion_manager.active_job(target.uuid)
+        if active_job:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Deletion already in progress for client {target.uuid}: job {active_job}")
     
-    db.delete(client)
-    db.commit()
+    cancelled, error_message = await asyncio.to_thread(task_manager.cancel_unless_running, [target.uuid for target in targets])
+    if not cancelled:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=error_message)
     
+    if skip_infrastructure:
+        await client_service.delete_clients(db, [*sub_hospitals, client])
+        return {
+            "message": f"Client {client_uuid} deleted successfully",
+            "client_uuid": client_uuid,
+            "infrastructure_destroyed": False
+        }
+    
+    # Sub-hospitals are destroyed concurrently in the background, then the parent. Another
+    # delete may have claimed one of these clients while the cancel ran off the loop.
+    try:
+        job = deletion_manager.start(client, sub_hospitals)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    response.status_code = status.HTTP_202_ACCEPTED
     return {
-        "message": f"Client {client_uuid} deleted successfully",
+        "message": f"Deletion of client {client_uuid} started",
         "client_uuid": client_uuid,
-        "infrastructure_destroyed": not skip_infrastructure
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['job_id']}",
+        "sub_hospitals": len(sub_hospitals)
     }
 
+
+@router.get("/api/admission")
+async def get_admission_status():
+    snapshot = await asyncio.to_thread(admission_controller.snapshot)
+    snapshot["queued"] = task_manager.queued_count()
+    return snapshot
+
+
+@router.get("/api/workspaces")
+async def get_workspace_usage():
+    return await asyncio.to_thread(workspace_index.summary)
+
+
+@router.get("/api/jobs/{job_id}", response_model=DeletionJobResponse)
+async def get_job_status(job_id: str):
+    job = deletion_manager.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job not found: {job_id}")
+    return job
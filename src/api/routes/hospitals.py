@@ -1,23 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from src.core.database import get_db, ClientStatusEnum
-from src.core.client_service import ClientService
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.database import get_async_db, ClientStatusEnum
+from src.core.async_client_service import AsyncClientService
+from src.core.client_service import STATUS_FIELDS
 from src.core.background_tasks import task_manager
 from src.core.services.db_main import MainHospitalDBService
 from src.config.settings import settings
-from src.models.models import ClientRegistrationRequest, ClientRegistrationResponse, ClientStatusResponse
+from src.models.models import (
+    BatchRegistrationRequest, BatchRegistrationResponse, BatchStatusResponse,
+    ClientRegistrationRequest, ClientRegistrationResponse, ClientStatusResponse
+)
 from src.api.middleware.auth import verify_api_key
+from src.api.conditional import etag_matches, json_response, not_modified
 
 router = APIRouter(prefix="/api/hospitals", tags=["Hospitals"], dependencies=[Depends(verify_api_key)])
-client_service = ClientService()
+client_service = AsyncClientService()
 db_service = MainHospitalDBService()
 
 
 @router.post("/register", response_model=ClientRegistrationResponse, status_code=status.HTTP_201_CREATED)
-async def register_hospital(request: ClientRegistrationRequest, db: Session = Depends(get_db)):
+async def register_hospital(request: ClientRegistrationRequest, db: AsyncSession = Depends(get_async_db)):
     try:
-        client = client_service.create_client(db, request)
-        client_service.update_client_status(db, client.uuid, ClientStatusEnum.IN_PROGRESS)
+        client = await client_service.create_client(db, request)
+        await client_service.update_client_status(db, client.uuid, ClientStatusEnum.QUEUED)
         
         client_info = {
             "client_name": request.client_name,
@@ -31,7 +38,7 @@ async def register_hospital(request: ClientRegistrationRequest, db: Session = De
         return ClientRegistrationResponse(
             client_uuid=client.uuid,
             job_id=client.job_id,
-            status=client_service.map_db_status_to_api_status(ClientStatusEnum.IN_PROGRESS),
+            status=client_service.map_db_status_to_api_status(ClientStatusEnum.QUEUED),
             status_url=f"/api/clients/{client.uuid}/status",
             created_at=client.created_at
         )
@@ -39,30 +46,81 @@ async def register_hospital(request: ClientRegistrationRequest, db: Session = De
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to register hospital: {str(e)}")
 
 
+@router.post("/register:batch", response_model=BatchRegistrationResponse, status_code=status.HTTP_201_CREATED)
+async def register_batch(request: BatchRegistrationRequest, db: AsyncSession = Depends(get_async_db)):
+    try:
+        batch_id, items = await client_service.create_client_batch(db, request.clients)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to register batch: {str(e)}")
+    
+    # Parents are scheduled first; their sub-hospitals start once the parent completes
+    task_manager.deploy_batch([
+        (item.client_uuid, {
+            "client_name": item.client_name,
+            "environment": item.environment,
+            "region": item.region,
+            "parent_uuid": item.parent_uuid
+        })
+        for item in request.clients
+    ])
+    
+    return BatchRegistrationResponse(
+        batch_id=batch_id,
+        status_url=f"/api/hospitals/batches/{batch_id}",
+        total=len(items),
+        items=items
+    )
+
+
+@router.get("/batches/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(batch_id: str, db: AsyncSession = Depends(get_async_db)):
+    clients = await client_service.get_batch_clients(db, batch_id)
+    if not clients:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Batch not found: {batch_id}")
+    
+    items = [client_service.to_batch_item(client) for client in clients]
+    counts = {}
+    for item in items:
+        counts[item.status.value] = counts.get(item.status.value, 0) + 1
+    
+    if counts.get("completed", 0) == len(items):
+        batch_status = "completed"
+    elif counts.get("completed", 0) + counts.get("failed", 0) == len(items):
+        batch_status = "failed"
+    else:
+        batch_status = "in_progress"
+    
+    return BatchStatusResponse(batch_id=batch_id, status=batch_status, total=len(items), counts=counts, items=items)
+
+
 @router.get("/{hospital_uuid}/status", response_model=ClientStatusResponse)
-async def get_hospital_status(hospital_uuid: str, db: Session = Depends(get_db)):
-    client = client_service.get_client_by_uuid(db, hospital_uuid)
-    if not client:
+async def get_hospital_status(hospital_uuid: str, fields: Optional[str] = Query(None, description="Comma-separated status fields to return"),
+                              if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_async_db)):
+    try:
+        selected = client_service.parse_fields(fields, STATUS_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    queue_position = task_manager.queue_position(hospital_uuid)
+    if if_none_match:
+        updated_at = await client_service.get_client_updated_at(db, hospital_uuid)
+        if updated_at:
+            etag = client_service.status_etag(hospital_uuid, updated_at, queue_position, selected)
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag)
+    
+    row = await client_service.get_status_fields(db, hospital_uuid, selected)
+    if not row:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Hospital not found: {hospital_uuid}")
     
-    terraform_outputs = client_service.parse_terraform_outputs(client.terraform_outputs)
-    return ClientStatusResponse(
-        client_uuid=client.uuid,
-        client_name=client.client_name,
-        job_id=client.job_id,
-        status=client_service.map_db_status_to_api_status(client.status),
-        environment=client.environment,
-        region=client.region,
-        created_at=client.created_at,
-        updated_at=client.updated_at,
-        error_message=client.error_message,
-        terraform_outputs=terraform_outputs
-    )
+    etag = client_service.status_etag(hospital_uuid, row.updated_at, queue_position, selected)
+    return json_response(client_service.to_status_fields(row, selected, queue_position), etag)
 
 
 @router.post("/{hospital_uuid}/create-tables")
-async def create_tables(hospital_uuid: str, db: Session = Depends(get_db)):
-    client = client_service.get_client_by_uuid(db, hospital_uuid)
+async def create_tables(hospital_uuid: str, db: AsyncSession = Depends(get_async_db)):
+    client = await client_service.get_client_by_uuid(db, hospital_uuid)
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Hospital not found: {hospital_uuid}")
 
@@ -74,7 +132,7 @@ async def create_tables(hospital_uuid: str, db: Session = Depends(get_db)):
     
     try:
         region = client.region or settings.gcp_region
-        terraform_outputs = client_service.parse_terraform_outputs(client.terraform_outputs)
+        terraform_outputs = client_service.to_terraform_outputs(client.outputs)
         private_bucket_name = terraform_outputs.private_bucket_name if terraform_outputs else None
         database_name = terraform_outputs.database_name if terraform_outputs else None
 
@@ -87,7 +145,7 @@ async def create_tables(hospital_uuid: str, db: Session = Depends(get_db)):
             if not private_bucket_name:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Private bucket name not found in outputs")
 
-            parent_hospital = client_service.get_client_by_uuid(db, client.parent_uuid)
+            parent_hospital = await client_service.get_client_by_uuid(db, client.parent_uuid)
             if not parent_hospital:
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent hospital not found")
             if parent_hospital.status != ClientStatusEnum.COMPLETED:
@@ -97,7 +155,8 @@ async def create_tables(hospital_uuid: str, db: Session = Depends(get_db)):
                 )
 
             sub_db_service = SubHospitalDBService()
-            success, message = sub_db_service.create_tables(
+            success, message = await asyncio.to_thread(
+                sub_db_service.create_tables,
                 hospital_uuid, client.parent_uuid, database_name, region, private_bucket_name
             )
         else:
@@ -107,7 +166,7 @@ async def create_tables(hospital_uuid: str, db: Session = Depends(get_db)):
                     detail="Private bucket name not found in outputs"
                 )
 
-            success, message = db_service.create_tables(hospital_uuid, region, private_bucket_name)
+            success, message = await asyncio.to_thread(db_service.create_tables, hospital_uuid, region, private_bucket_name)
         
         if success:
             return {"message": "Tables created successfully", "hospital_uuid": hospital_uuid, "details": message}
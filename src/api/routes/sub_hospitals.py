@@ -1,18 +1,19 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from src.core.database import get_db, ClientStatusEnum
-from src.core.client_service import ClientService
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.database import get_async_db, ClientStatusEnum
+from src.core.async_client_service import AsyncClientService
 from src.core.background_tasks import task_manager
 from src.models.models import ClientRegistrationRequest, ClientRegistrationResponse
 from src.api.middleware.auth import verify_api_key
 
 router = APIRouter(prefix="/api/hospitals", tags=["Hospitals"], dependencies=[Depends(verify_api_key)])
-client_service = ClientService()
+client_service = AsyncClientService()
 
 
 @router.post("/{parent_uuid}/sub-hospitals/register", response_model=ClientRegistrationResponse, status_code=status.HTTP_201_CREATED)
-async def register_sub_hospital(parent_uuid: str, request: ClientRegistrationRequest, db: Session = Depends(get_db)):
-    parent_hospital = client_service.get_client_by_uuid(db, parent_uuid)
+async def register_sub_hospital(parent_uuid: str, request: ClientRegistrationRequest, db: AsyncSession = Depends(get_async_db)):
+    parent_hospital = await client_service.get_client_by_uuid(db, parent_uuid)
     if not parent_hospital:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Parent hospital not found: {parent_uuid}")
     
@@ -25,8 +26,8 @@ async def register_sub_hospital(parent_uuid: str, request: ClientRegistrationReq
     request.parent_uuid = parent_uuid
     
     try:
-        client = client_service.create_client(db, request)
-        client_service.update_client_status(db, client.uuid, ClientStatusEnum.IN_PROGRESS)
+        client = await client_service.create_client(db, request)
+        await client_service.update_client_status(db, client.uuid, ClientStatusEnum.QUEUED)
         
         client_info = {
             "client_name": request.client_name,
@@ -40,7 +41,7 @@ async def register_sub_hospital(parent_uuid: str, request: ClientRegistrationReq
         return ClientRegistrationResponse(
             client_uuid=client.uuid,
             job_id=client.job_id,
-            status=client_service.map_db_status_to_api_status(ClientStatusEnum.IN_PROGRESS),
+            status=client_service.map_db_status_to_api_status(ClientStatusEnum.QUEUED),
             status_url=f"/api/clients/{client.uuid}/status",
             created_at=client.created_at
         )
@@ -51,12 +52,12 @@ async def register_sub_hospital(parent_uuid: str, request: ClientRegistrationReq
 
 
 @router.post("/{hospital_uuid}/sub-hospitals/create-tables")
-async def create_sub_tables(hospital_uuid: str, db: Session = Depends(get_db)):
+async def create_sub_tables(hospital_uuid: str, db: AsyncSession = Depends(get_async_db)):
     from src.core.services.db_sub import SubHospitalDBService
     from src.config.settings import settings
     
     db_service = SubHospitalDBService()
-    client = client_service.get_client_by_uuid(db, hospital_uuid)
+    client = await client_service.get_client_by_uuid(db, hospital_uuid)
     if not client:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Hospital not found: {hospital_uuid}")
     
@@ -71,11 +72,11 @@ async def create_sub_tables(hospital_uuid: str, db: Session = Depends(get_db)):
     
     try:
         region = client.region or settings.gcp_region
-        parent_hospital = client_service.get_client_by_uuid(db, client.parent_uuid)
+        parent_hospital = await client_service.get_client_by_uuid(db, client.parent_uuid)
         if not parent_hospital:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Parent hospital not found")
         
-        terraform_outputs = client_service.parse_terraform_outputs(client.terraform_outputs)
+        terraform_outputs = client_service.to_terraform_outputs(client.outputs)
         if not terraform_outputs or not terraform_outputs.private_bucket_name:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Sub-hospital's private bucket name not found in outputs")
         
@@ -84,7 +85,8 @@ async def create_sub_tables(hospital_uuid: str, db: Session = Depends(get_db)):
         if not database_name:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Database name not found in outputs")
         
-        success, message = db_service.create_tables(
+        success, message = await asyncio.to_thread(
+            db_service.create_tables,
             hospital_uuid, client.parent_uuid, database_name, region, terraform_outputs.private_bucket_name
         )
         
@@ -28,11 +28,64 @@ class Settings(BaseSettings):
     terraform_binary: str = "terraform"
     terraform_init_timeout: int = 600
     terraform_apply_timeout: int = 1800
+    # Shared provider cache and pinned lock file so client workspaces never
+    # re-download providers. Upgrades only happen when the template changes.
+    terraform_plugin_cache_dir: Path = Path("/data/terraform/plugin-cache")
+    terraform_lock_dir: Path = Path("/data/terraform/lock")
+    template_snapshots_path: Path = Path("/data/terraform/templates")
+    terraform_upgrade_on_template_change: bool = True
+    terraform_log_tail_lines: int = 200
+    # Write a saved plan first and skip the apply entirely when nothing changed.
+    terraform_plan_before_apply: bool = True
+    log_stream_poll_interval: float = 0.5
+    
+    max_concurrent_deployments: int = 4
+    max_concurrent_destroys: int = 4
+    deletion_job_ttl: int = 3600  # Seconds a finished deletion job stays visible via /api/jobs
+    
+    # Admission control: deployments wait while the host is above these thresholds
+    admission_control_enabled: bool = True
+    admission_max_load_per_cpu: float = 2.0
+    admission_min_available_memory_mb: int = 512
+    admission_min_free_disk_mb: int = 1024
+    admission_memory_per_job_mb: int = 1024
+    admission_poll_interval: float = 5.0
+    terraform_min_parallelism: int = 2
+    terraform_max_parallelism: int = 10
+    
+    # Workspace eviction: least recently used completed workspaces are removed once the
+    # deployments path exceeds the budget and rebuilt from the template when needed (0 disables)
+    workspace_disk_budget_mb: int = 0
+    workspace_eviction_min_idle_minutes: int = 60
+    
+    # Startup reconciliation of deployments orphaned by a restart
+    reconcile_on_startup: bool = True
+    reconcile_concurrency: int = 4
+    reconcile_max_resume_attempts: int = 2
+    
+    # Change events streamed from /api/events: recent events kept for Last-Event-ID resume,
+    # and events buffered per subscriber before a slow stream is closed to resume later
+    event_history_size: int = 1000
+    event_subscriber_queue_size: int = 1000
+    event_heartbeat_interval: float = 15.0
+    event_stream_retry_ms: int = 2000
+    
+    # Sub-hospital provisioning engine: "terraform" (full workspace) or "sdk" (direct API calls)
+    sub_hospital_provisioner: str = "terraform"
+    sub_provisioner_timeout: int = 300
     
     state_backend_type: str = "gcs"
     state_bucket_name: str = "medical-circles-terraform-state-files"
     
     database_url: str = f"sqlite:///{database_path}"
+    # SQLite tuning: WAL lets API reads proceed while deployment threads write, and writers
+    # wait up to the busy timeout for the lock instead of failing with "database is locked"
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 15000
+    db_pool_size: int = 10
+    db_pool_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
     
     db_init_vm_name: str = "db-init-cluster-001-dev"
     # Force the zone to the running init VM to avoid region mismatches when clients
@@ -49,4 +102,5 @@ settings = Settings()
 
 # Ensure deployment directories exist
 settings.deployments_base_path.mkdir(parents=True, exist_ok=True)
+settings.terraform_plugin_cache_dir.mkdir(parents=True, exist_ok=True)
 
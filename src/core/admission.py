@@ -0,0 +1,175 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class AdmissionController:
+    # Holds deployments back while the host is short on CPU, memory or disk and picks
+    # terraform -parallelism for each admitted job from the remaining headroom.
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._admitted: Dict[str, int] = {}
+        self._waiting: Dict[str, Dict[str, Any]] = {}
+        self._decisions = deque(maxlen=50)
+
+    @staticmethod
+    def _cpu_count() -> int:
+        try:
+            return len(os.sched_getaffinity(0))
+        except AttributeError:
+            return os.cpu_count() or 1
+
+    @staticmethod
+    def _read_int(path: Path) -> Optional[int]:
+        try:
+            value = path.read_text().strip()
+        except OSError:
+            return None
+        return int(value) if value.isdigit() else None
+
+    def _available_memory_mb(self) -> Optional[float]:
+        available = None
+        try:
+            with open("/proc/meminfo") as meminfo:
+                for line in meminfo:
+                    if line.startswith("MemAvailable:"):
+                        available = int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+
+        # Container limits: cgroup v2, then v1
+        cgroup = Path("/sys/fs/cgroup")
+        for limit_file, usage_file in [("memory.max", "memory.current"),
+                                       ("memory/memory.limit_in_bytes", "memory/memory.usage_in_bytes")]:
+            limit = self._read_int(cgroup / limit_file)
+            usage = self._read_int(cgroup / usage_file)
+            if limit is not None and usage is not None and limit < (1 << 60):
+                cgroup_available = max(limit - usage, 0)
+                available = cgroup_available if available is None else min(available, cgroup_available)
+                break
+
+        return None if available is None else available / MB
+
+    def sample(self) -> Dict[str, Any]:
+        cpu_count = self._cpu_count()
+        try:
+            load = os.getloadavg()[0]
+        except OSError:
+            load = 0.0
+        try:
+            disk_free_mb = shutil.disk_usage(settings.deployments_base_path).free / MB
+        except OSError:
+            disk_free_mb = None
+        memory_mb = self._available_memory_mb()
+        return {
+            "cpu_count": cpu_count,
+            "load_per_cpu": round(load / cpu_count, 2),
+            "memory_available_mb": None if memory_mb is None else round(memory_mb),
+            "disk_free_mb": None if disk_free_mb is None else round(disk_free_mb)
+        }
+
+    def evaluate(self, sample: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        sample = sample or self.sample()
+        reasons: List[str] = []
+        if sample["load_per_cpu"] > settings.admission_max_load_per_cpu:
+            reasons.append(f"load per CPU {sample['load_per_cpu']} > {settings.admission_max_load_per_cpu}")
+        if sample["memory_available_mb"] is not None and sample["memory_available_mb"] < settings.admission_min_available_memory_mb:
+            reasons.append(f"available memory {sample['memory_available_mb']} MB < {settings.admission_min_available_memory_mb} MB")
+        if sample["disk_free_mb"] is not None and sample["disk_free_mb"] < settings.admission_min_free_disk_mb:
+            reasons.append(f"free disk {sample['disk_free_mb']} MB < {settings.admission_min_free_disk_mb} MB")
+
+        cpu_headroom = max(0.0, 1 - sample["load_per_cpu"] / settings.admission_max_load_per_cpu)
+        if sample["memory_available_mb"] is None:
+            memory_headroom = 1.0
+        else:
+            spare_mb = sample["memory_available_mb"] - settings.admission_min_available_memory_mb
+            memory_headroom = min(1.0, max(0.0, spare_mb / settings.admission_memory_per_job_mb))
+        headroom = min(cpu_headroom, memory_headroom)
+        parallelism = max(
+            settings.terraform_min_parallelism,
+            round(settings.terraform_max_parallelism * headroom)
+        )
+        return {"admitted": not reasons, "reasons": reasons, "parallelism": parallelism, "sample": sample}
+
+    def _record(self, client_uuid: str, decision: Dict[str, Any]) -> None:
+        self._decisions.append({
+            "client_uuid": client_uuid,
+            "admitted": decision["admitted"],
+            "reasons": decision["reasons"],
+            "parallelism": decision["parallelism"],
+            "sample": decision["sample"],
+            "decided_at": datetime.utcnow().isoformat()
+        })
+
+    def wait_for_admission(self, client_uuid: str, cancelled: Callable[[], bool] = lambda: False) -> Optional[int]:
+        # Blocks the calling worker until the job may start. Returns the -parallelism to use,
+        # or None if the job was cancelled while waiting.
+        if not settings.admission_control_enabled:
+            with self._lock:
+                self._admitted[client_uuid] = settings.terraform_max_parallelism
+            return settings.terraform_max_parallelism
+
+        while True:
+            if cancelled():
+                with self._lock:
+                    self._waiting.pop(client_uuid, None)
+                return None
+            decision = self.evaluate()
+            with self._lock:
+                # A lone job is always admitted; holding it would not free any resources
+                if decision["admitted"] or not self._admitted:
+                    if not decision["admitted"]:
+                        decision["reasons"].append("admitted anyway: no other deployment is running")
+                        decision["admitted"] = True
+                        decision["parallelism"] = settings.terraform_min_parallelism
+                    self._waiting.pop(client_uuid, None)
+                    self._admitted[client_uuid] = decision["parallelism"]
+                    self._record(client_uuid, decision)
+                    return decision["parallelism"]
+                if client_uuid not in self._waiting:
+                    self._record(client_uuid, decision)
+                    logger.warning(f"Holding deployment {client_uuid}: {', '.join(decision['reasons'])}")
+                waiting = self._waiting.setdefault(client_uuid, {"since": datetime.utcnow().isoformat()})
+                waiting["reasons"] = decision["reasons"]
+            time.sleep(settings.admission_poll_interval)
+
+    def release(self, client_uuid: str) -> None:
+        with self._lock:
+            self._admitted.pop(client_uuid, None)
+
+    def is_waiting(self, client_uuid: str) -> bool:
+        with self._lock:
+            return client_uuid in self._waiting
+
+    def snapshot(self) -> Dict[str, Any]:
+        decision = self.evaluate()
+        with self._lock:
+            return {
+                "enabled": settings.admission_control_enabled,
+                "thresholds": {
+                    "max_load_per_cpu": settings.admission_max_load_per_cpu,
+                    "min_available_memory_mb": settings.admission_min_available_memory_mb,
+                    "min_free_disk_mb": settings.admission_min_free_disk_mb,
+                    "memory_per_job_mb": settings.admission_memory_per_job_mb,
+                    "parallelism_range": [settings.terraform_min_parallelism, settings.terraform_max_parallelism]
+                },
+                "current": decision,
+                "running": [{"client_uuid": client_uuid, "parallelism": parallelism} for client_uuid, parallelism in self._admitted.items()],
+                "waiting": [{"client_uuid": client_uuid, **waiting} for client_uuid, waiting in self._waiting.items()],
+                "recent_decisions": list(reversed(self._decisions))
+            }
+
+
+admission_controller = AdmissionController()
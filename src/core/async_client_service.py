@@ -0,0 +1,112 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.core.client_service import ClientService
+from src.core.database import Client, ClientListVersion, ClientStatusEnum
+from src.core.event_bus import event_bus
+from src.models.models import BatchRegistrationItem, ClientRegistrationRequest
+
+
+# Same queries and updates as ClientService, on an AsyncSession, so request handlers never run
+# SQLite on the event loop thread. Background workers keep the synchronous ClientService.
+class AsyncClientService(ClientService):
+
+    @staticmethod
+    async def create_client(db: AsyncSession, request: ClientRegistrationRequest) -> Client:
+        if await AsyncClientService.get_client_by_uuid(db, request.client_uuid):
+            raise ValueError(f"Client with UUID {request.client_uuid} already exists")
+
+        client = ClientService.new_client(request)
+        db.add(client)
+        await db.commit()
+        await db.refresh(client)
+        ClientService.publish_status("created", client)
+        return client
+
+    @staticmethod
+    async def create_client_batch(db: AsyncSession, requests: List[ClientRegistrationRequest]) -> Tuple[str, List[BatchRegistrationItem]]:
+        lookup = ClientService.batch_lookup_uuids(requests)
+        existing = {client.uuid: client for client in (await db.scalars(select(Client).where(Client.uuid.in_(lookup)))).all()}
+        batch_id, clients, items = ClientService.prepare_batch(requests, existing)
+        events = [(client.uuid, client.parent_uuid, ClientService.status_event_data(client)) for client in clients]
+        db.add_all(clients)
+        await db.commit()
+        for client_uuid, parent_uuid, data in events:
+            event_bus.publish("created", client_uuid, parent_uuid, data)
+        return batch_id, items
+
+    @staticmethod
+    async def get_batch_clients(db: AsyncSession, batch_id: str) -> List[Client]:
+        statement = select(Client).where(Client.batch_id == batch_id).order_by(Client.created_at, Client.parent_uuid.isnot(None))
+        return list((await db.scalars(statement)).all())
+
+    @staticmethod
+    async def get_sub_hospitals(db: AsyncSession, parent_uuid: str) -> List[Client]:
+        statement = select(Client).where(Client.parent_uuid == parent_uuid).order_by(Client.created_at.desc())
+        return list((await db.scalars(statement)).all())
+
+    @staticmethod
+    async def get_client_by_uuid(db: AsyncSession, client_uuid: str) -> Optional[Client]:
+        return await db.scalar(select(Client).where(Client.uuid == client_uuid))
+
+    @staticmethod
+    async def list_clients_page(db: AsyncSession, limit: int, cursor: Optional[str] = None,
+                                fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        rows = (await db.execute(ClientService.list_page_statement(limit, cursor, fields))).all()
+        return ClientService.to_list_page(rows, limit, fields)
+    
+    @staticmethod
+    async def get_status_fields(db: AsyncSession, client_uuid: str, fields: List[str]) -> Optional[Any]:
+        return (await db.execute(ClientService.status_statement(client_uuid, fields))).first()
+
+    @staticmethod
+    async def count_clients(db: AsyncSession) -> int:
+        return await db.scalar(select(func.count(Client.uuid)))
+
+    @staticmethod
+    async def get_list_version(db: AsyncSession) -> int:
+        return await db.scalar(select(ClientListVersion.version).where(ClientListVersion.id == 1)) or 0
+
+    @staticmethod
+    async def get_client_updated_at(db: AsyncSession, client_uuid: str) -> Optional[datetime]:
+        return await db.scalar(select(Client.updated_at).where(Client.uuid == client_uuid))
+
+    @staticmethod
+    async def update_client_status(db: AsyncSession, client_uuid: str, status: ClientStatusEnum, error_message: Optional[str] = None,
+                                   operation: Optional[str] = None) -> Optional[Client]:
+        client = await AsyncClientService.get_client_by_uuid(db, client_uuid)
+        if client:
+            ClientService.apply_status(client, status, error_message, operation)
+            await db.commit()
+            await db.refresh(client)
+            ClientService.status_committed(client)
+        return client
+
+    @staticmethod
+    async def update_client_outputs(db: AsyncSession, client_uuid: str, outputs: dict) -> Optional[Client]:
+        client = await AsyncClientService.get_client_by_uuid(db, client_uuid)
+        if client:
+            safe_outputs = ClientService.apply_outputs(client, outputs)
+            await db.commit()
+            await db.refresh(client)
+            event_bus.publish("outputs", client.uuid, client.parent_uuid, {"terraform_outputs": safe_outputs})
+        return client
+
+    @staticmethod
+    async def delete_client(db: AsyncSession, client_uuid: str) -> bool:
+        client = await AsyncClientService.get_client_by_uuid(db, client_uuid)
+        if not client:
+            return False
+        await AsyncClientService.delete_clients(db, [client])
+        return True
+    
+    @staticmethod
+    async def delete_clients(db: AsyncSession, clients: List[Client]) -> None:
+        # One transaction for a hospital and its sub-hospitals
+        deleted = [(client.uuid, client.parent_uuid) for client in clients]
+        for client in clients:
+            await db.delete(client)
+        await db.commit()
+        for client_uuid, parent_uuid in deleted:
+            event_bus.publish("deleted", client_uuid, parent_uuid)
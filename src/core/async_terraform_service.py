@@ -0,0 +1,215 @@
+import asyncio
+import subprocess
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.config.settings import settings
+from src.core.terraform_progress import ApplyProgressTracker
+from src.core.terraform_service import TerraformService, PLAN_FILE_NAME
+from src.core.workspace_index import workspace_index
+from src.core.metrics import observe_phase
+
+# Terraform JSON lines (plan diagnostics in particular) can exceed asyncio's 64 KiB default.
+STREAM_LIMIT = 1024 * 1024
+
+
+# Same workspace/command handling as TerraformService, but terraform runs as an asyncio
+# subprocess so async routes never block the event loop. Timeouts and task cancellation
+# kill the whole terraform process group. The coroutines carry an _async suffix so the
+# inherited synchronous methods (and the sync paths that call them) keep working.
+class AsyncTerraformService(TerraformService):
+
+    async def _run_streaming_async(self, command: List[str], workspace_path: Path, log_name: str, timeout: int,
+                                   env: Dict[str, str], line_handler: Optional[Callable[[str], str]] = None) -> Tuple[int, str]:
+        log_path = workspace_path / log_name
+        tail = deque(maxlen=settings.terraform_log_tail_lines)
+        started = time.monotonic()
+
+        self._register_active_log(workspace_path, log_path)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=workspace_path,
+                stdin=subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                env=env,
+                start_new_session=True,
+                limit=STREAM_LIMIT
+            )
+
+            async def pump() -> int:
+                with open(log_path, "w", buffering=1) as log_file:
+                    async for raw_line in process.stdout:
+                        line = raw_line.decode(errors="replace")
+                        if line_handler is not None:
+                            line = line_handler(line)
+                        log_file.write(line)
+                        tail.append(line.rstrip("\n"))
+                return await process.wait()
+
+            try:
+                returncode = await asyncio.wait_for(pump(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self._kill_process_group(process)
+                await process.wait()
+                raise subprocess.TimeoutExpired(command, timeout, output="\n".join(tail))
+            except asyncio.CancelledError:
+                self._kill_process_group(process)
+                raise
+        finally:
+            self._unregister_active_log(workspace_path, log_path)
+            observe_phase(Path(log_name).stem, time.monotonic() - started)
+
+        return returncode, "\n".join(tail)
+
+    async def run_terraform_init_async(self, workspace_path: Path) -> Tuple[bool, str]:
+        credentials_file = await asyncio.to_thread(self._prepare_credentials, workspace_path)
+        if credentials_file is None:
+            return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+
+        await asyncio.to_thread(self._ensure_workspace_lock_file, workspace_path)
+        env = self._terraform_env(credentials_file)
+
+        try:
+            returncode, output = await self._run_streaming_async(
+                self._init_command(),
+                workspace_path,
+                "init.log",
+                settings.terraform_init_timeout,
+                env
+            )
+            return returncode == 0, output
+        except subprocess.TimeoutExpired:
+            return False, f"Terraform init timed out after {settings.terraform_init_timeout} seconds"
+        except Exception as e:
+            return False, f"Error running terraform init: {str(e)}"
+
+    async def run_terraform_plan_async(self, workspace_path: Path) -> Tuple[bool, str]:
+        credentials_file = await asyncio.to_thread(self._prepare_credentials, workspace_path)
+        if credentials_file is None:
+            return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+
+        env = self._terraform_env(credentials_file)
+        (workspace_path / PLAN_FILE_NAME).unlink(missing_ok=True)
+
+        try:
+            self.progress_tracker = ApplyProgressTracker()
+            returncode, output = await self._run_streaming_async(
+                self._plan_command(),
+                workspace_path,
+                "plan.log",
+                settings.terraform_apply_timeout,
+                env,
+                line_handler=self._track_progress
+            )
+            return self._plan_result(returncode, output)
+        except subprocess.TimeoutExpired:
+            return False, f"Terraform plan timed out after {settings.terraform_apply_timeout} seconds"
+        except Exception as e:
+            return False, f"Error running terraform plan: {str(e)}"
+
+    async def run_terraform_apply_async(self, workspace_path: Path, plan_file: Optional[str] = None) -> Tuple[bool, str]:
+        credentials_file = await asyncio.to_thread(self._prepare_credentials, workspace_path)
+        if credentials_file is None:
+            return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+
+        env = self._terraform_env(credentials_file)
+
+        try:
+            if not plan_file or self.progress_tracker is None:
+                self.progress_tracker = ApplyProgressTracker()
+            returncode, output = await self._run_streaming_async(
+                self._apply_command(plan_file),
+                workspace_path,
+                "apply.log",
+                settings.terraform_apply_timeout,
+                env,
+                line_handler=self._track_progress
+            )
+            return self._apply_result(returncode, output)
+        except subprocess.TimeoutExpired:
+            return False, f"Terraform apply timed out after {settings.terraform_apply_timeout} seconds"
+        except Exception as e:
+            return False, f"Error running terraform apply: {str(e)}"
+
+    async def run_terraform_destroy_async(self, workspace_path: Path) -> Tuple[bool, str]:
+        if not workspace_path.exists():
+            return False, "Workspace not found"
+
+        credentials_file = await asyncio.to_thread(self._prepare_credentials, workspace_path)
+        if credentials_file is None:
+            return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+
+        env = self._terraform_env(credentials_file)
+
+        try:
+            returncode, output = await self._run_streaming_async(
+                self._destroy_command(),
+                workspace_path,
+                "destroy.log",
+                settings.terraform_apply_timeout,
+                env
+            )
+            return returncode == 0, output
+        except subprocess.TimeoutExpired:
+            return False, f"Terraform destroy timed out after {settings.terraform_apply_timeout} seconds"
+        except Exception as e:
+            return False, f"Error running terraform destroy: {str(e)}"
+
+    async def run_full_deployment_async(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+        await asyncio.to_thread(workspace_index.acquire, client_uuid)
+        try:
+            return await self._run_deployment_async(client_uuid, client_info)
+        finally:
+            await asyncio.to_thread(workspace_index.release, client_uuid)
+
+    async def _run_deployment_async(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+        try:
+            workspace_path = await asyncio.to_thread(self.create_client_workspace, client_uuid, client_info)
+            success, output = await self.run_terraform_init_async(workspace_path)
+            if not success:
+                return False, None, f"Terraform init failed: {output}"
+            if settings.terraform_plan_before_apply:
+                success, output = await self.run_terraform_plan_async(workspace_path)
+                if not success:
+                    return False, None, f"Terraform plan failed: {output}"
+                if self.plan_summary["has_changes"]:
+                    success, output = await self.run_terraform_apply_async(workspace_path, plan_file=PLAN_FILE_NAME)
+            else:
+                success, output = await self.run_terraform_apply_async(workspace_path)
+            if not success:
+                return False, None, f"Terraform apply failed: {output}"
+            outputs = await asyncio.to_thread(self.get_terraform_outputs, workspace_path)
+            if outputs is None:
+                return False, None, "Failed to retrieve Terraform outputs"
+            return True, outputs, None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return False, None, f"Deployment failed: {str(e)}"
+
+    async def destroy_client_infrastructure_async(self, client_uuid: str, client_info: Optional[Dict[str, Any]] = None) -> Tuple[bool, Optional[str]]:
+        await asyncio.to_thread(workspace_index.acquire, client_uuid)
+        try:
+            workspace_path = self.get_workspace_path(client_uuid)
+            if not workspace_path.exists():
+                if not await asyncio.to_thread(workspace_index.is_evicted, client_uuid):
+                    return True, None
+                if client_info is None:
+                    return False, "Workspace was evicted and cannot be rebuilt without client info"
+                success, output = await self.rehydrate_workspace_async(client_uuid, client_info)
+                if not success:
+                    return False, f"Failed to rebuild evicted workspace: {output}"
+            success, output = await self.run_terraform_destroy_async(workspace_path)
+            if success:
+                return True, None
+            else:
+                return False, f"Terraform destroy failed: {output}"
+        finally:
+            await asyncio.to_thread(workspace_index.release, client_uuid)
+
+    async def rehydrate_workspace_async(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, str]:
+        workspace_path = await asyncio.to_thread(self.create_client_workspace, client_uuid, client_info)
+        return await self.run_terraform_init_async(workspace_path)
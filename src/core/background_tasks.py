@@ -1,10 +1,16 @@
 import threading
-from typing import Dict, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from src.core.database import SessionLocal, ClientStatusEnum
 from src.core.client_service import ClientService
+from src.core.admission import admission_controller
+from src.core.workspace_index import workspace_index
+from src.core.metrics import bind_job_gauges
 from src.core.terraform_service import TerraformService
 from src.core.services.db_main import MainHospitalDBService
 from src.core.services.db_sub import SubHospitalDBService
+from src.core.services.sub_provisioner import get_provisioner
 from src.api.error_handler import enhance_terraform_error
 from src.config.settings import settings
 import re
@@ -19,21 +25,72 @@ class BackgroundTaskManager:
             with cls._lock:
                 if cls._instance is None:
                     cls._instance = super().__new__(cls)
-                    cls._instance._tasks = {}
-                    cls._instance._threads = {}
+                    cls._instance._executor = ThreadPoolExecutor(
+                        max_workers=settings.max_concurrent_deployments,
+                        thread_name_prefix="deployment"
+                    )
+                    cls._instance._futures = {}
+                    cls._instance._pending = deque()
+                    cls._instance._running = set()
+                    cls._instance._dependents = {}
+                    cls._instance._cancelled = set()
         return cls._instance
     
-    def deploy_hospital(self, client_uuid: str, client_info: Dict[str, Any]):
-        def task():
+    def _submit(self, client_uuid: str, task) -> int:
+        def run():
+            # Stay queued until the host has headroom for another terraform run
+            parallelism = admission_controller.wait_for_admission(client_uuid, lambda: client_uuid in self._cancelled)
+            with self._lock:
+                # A cancel can land between admission and this lock; honour it before the job counts as running
+                cancelled = parallelism is None or client_uuid in self._cancelled
+                if cancelled:
+                    self._cancelled.discard(client_uuid)
+                else:
+                    if client_uuid in self._pending:
+                        self._pending.remove(client_uuid)
+                    self._running.add(client_uuid)
+            if cancelled:
+                if parallelism is not None:
+                    admission_controller.release(client_uuid)
+                return
+            try:
+                task(parallelism)
+            finally:
+                admission_controller.release(client_uuid)
+                with self._lock:
+                    self._running.discard(client_uuid)
+                    self._futures.pop(client_uuid, None)
+                    dependents = self._dependents.pop(client_uuid, [])
+                self._release_dependents(client_uuid, dependents)
+                try:
+                    workspace_index.enforce_budget()
+                except Exception:
+                    pass
+        
+        with self._lock:
+            if client_uuid in self._futures:
+                raise ValueError(f"Deployment already scheduled for client {client_uuid}")
+            self._pending.append(client_uuid)
+            self._futures[client_uuid] = self._executor.submit(run)
+            return len(self._pending)
+    
+    def deploy_hospital(self, client_uuid: str, client_info: Dict[str, Any]) -> int:
+        def task(parallelism: int):
             db = SessionLocal()
             try:
                 client_service = ClientService()
-                terraform_service = TerraformService()
+                terraform_service = TerraformService(
+                    progress_callback=lambda progress: client_service.update_client_progress(db, client_uuid, progress),
+                    parallelism=parallelism
+                )
                 db_service = MainHospitalDBService()
                 
-                client_service.update_client_status(db, client_uuid, ClientStatusEnum.IN_PROGRESS)
+                if not client_service.update_client_status(db, client_uuid, ClientStatusEnum.IN_PROGRESS, operation="deploy"):
+                    return
                 
                 success, outputs, error_message = terraform_service.run_full_deployment(client_uuid, client_info)
+                if terraform_service.plan_summary:
+                    client_service.update_client_plan_summary(db, client_uuid, terraform_service.plan_summary)
                 
                 if success:
                     client_service.update_client_outputs(db, client_uuid, outputs)
@@ -49,27 +106,28 @@ class BackgroundTaskManager:
                     pass
             finally:
                 db.close()
-                with self._lock:
-                    if client_uuid in self._threads:
-                        del self._threads[client_uuid]
-                    if client_uuid in self._tasks:
-                        del self._tasks[client_uuid]
-        
-        thread = threading.Thread(target=task, daemon=True)
-        thread.start()
         
-        with self._lock:
-            self._tasks[client_uuid] = task
-            self._threads[client_uuid] = thread
+        return self._submit(client_uuid, task)
     
-    def deploy_sub_hospital(self, client_uuid: str, parent_uuid: str, client_info: Dict[str, Any]):
-        def task():
+    def deploy_sub_hospital(self, client_uuid: str, parent_uuid: str, client_info: Dict[str, Any]) -> int:
+        def task(parallelism: int):
             db = SessionLocal()
             try:
                 client_service = ClientService()
-                terraform_service = TerraformService()
                 
-                client_service.update_client_status(db, client_uuid, ClientStatusEnum.IN_PROGRESS)
+                client = client_service.update_client_status(db, client_uuid, ClientStatusEnum.IN_PROGRESS, operation="deploy")
+                if not client:
+                    return
+                
+                # A client keeps the engine it was first provisioned with so redeploys and destroys match
+                engine = client.provisioning_engine or settings.sub_hospital_provisioner
+                provisioner = get_provisioner(
+                    engine,
+                    progress_callback=lambda progress: client_service.update_client_progress(db, client_uuid, progress),
+                    parallelism=parallelism
+                )
+                if client.provisioning_engine != engine:
+                    client_service.update_client_engine(db, client_uuid, engine)
                 
                 parent_hospital = client_service.get_client_by_uuid(db, parent_uuid)
                 if not parent_hospital:
@@ -83,7 +141,9 @@ class BackgroundTaskManager:
                     )
                     return
                 
-                success, outputs, error_message = terraform_service.run_full_deployment(client_uuid, client_info)
+                success, outputs, error_message = provisioner.provision(client_uuid, client_info)
+                if provisioner.plan_summary:
+                    client_service.update_client_plan_summary(db, client_uuid, provisioner.plan_summary)
                 
                 if success:
                     client_service.update_client_outputs(db, client_uuid, outputs)
@@ -99,22 +159,126 @@ class BackgroundTaskManager:
                     pass
             finally:
                 db.close()
-                with self._lock:
-                    if client_uuid in self._threads:
-                        del self._threads[client_uuid]
-                    if client_uuid in self._tasks:
-                        del self._tasks[client_uuid]
         
-        thread = threading.Thread(target=task, daemon=True)
-        thread.start()
+        return self._submit(client_uuid, task)
+    
+    def deploy_after_parent(self, client_uuid: str, parent_uuid: str, client_info: Dict[str, Any]) -> Optional[int]:
+        # Sub-hospitals registered together with a queued or running parent wait for it to finish
+        with self._lock:
+            if parent_uuid in self._futures:
+                self._dependents.setdefault(parent_uuid, []).append((client_uuid, client_info))
+                return None
+        return self.deploy_sub_hospital(client_uuid, parent_uuid, client_info)
+    
+    def deploy_batch(self, items: List[Tuple[str, Dict[str, Any]]]) -> None:
+        for client_uuid, client_info in items:
+            if not client_info.get("parent_uuid"):
+                self.deploy_hospital(client_uuid, client_info)
+        for client_uuid, client_info in items:
+            if client_info.get("parent_uuid"):
+                self.deploy_after_parent(client_uuid, client_info["parent_uuid"], client_info)
+    
+    def _release_dependents(self, parent_uuid: str, dependents: List[Tuple[str, Dict[str, Any]]]) -> None:
+        if not dependents:
+            return
+        db = SessionLocal()
+        try:
+            client_service = ClientService()
+            parent = client_service.get_client_by_uuid(db, parent_uuid)
+            parent_completed = parent is not None and parent.status == ClientStatusEnum.COMPLETED
+            for client_uuid, _ in dependents:
+                if parent_completed:
+                    client_service.update_client_status(db, client_uuid, ClientStatusEnum.QUEUED)
+                else:
+                    client_service.update_client_status(db, client_uuid, ClientStatusEnum.FAILED, "Parent hospital deployment failed")
+        except Exception:
+            parent_completed = False
+        finally:
+            db.close()
         
+        if parent_completed:
+            for client_uuid, client_info in dependents:
+                self.deploy_sub_hospital(client_uuid, parent_uuid, client_info)
+    
+    def _fail_dependents(self, dependents: List[Tuple[str, Dict[str, Any]]], error_message: str) -> None:
+        if not dependents:
+            return
+        db = SessionLocal()
+        try:
+            client_service = ClientService()
+            for client_uuid, _ in dependents:
+                client_service.update_client_status(db, client_uuid, ClientStatusEnum.FAILED, error_message)
+        finally:
+            db.close()
+    
+    def cancel(self, client_uuid: str) -> bool:
+        # Sub-hospitals waiting on a cancelled parent would never be submitted; fail them like
+        # _release_dependents does for a failed parent. Writes to the database, so call it off the loop.
         with self._lock:
-            self._tasks[client_uuid] = task
-            self._threads[client_uuid] = thread
+            if not self._cancel_locked(client_uuid):
+                return False
+            dependents = self._dependents.pop(client_uuid, [])
+        self._fail_dependents(dependents, "Parent hospital deployment cancelled")
+        return True
+    
+    def cancel_unless_running(self, client_uuids: List[str]) -> Tuple[bool, str]:
+        # Check and cancel under one lock so a deployment can't start in between; either every
+        # client is cancelled (or had nothing scheduled) or none is touched. Same database note as cancel.
+        with self._lock:
+            running = next((client_uuid for client_uuid in client_uuids if client_uuid in self._running), None)
+            if running:
+                return False, f"Deployment is still running for client: {running}"
+            dependents = []
+            for client_uuid in client_uuids:
+                if self._cancel_locked(client_uuid):
+                    dependents.extend(self._dependents.pop(client_uuid, []))
+        self._fail_dependents([dependent for dependent in dependents if dependent[0] not in client_uuids], "Parent hospital deployment cancelled")
+        return True, ""
+    
+    def _cancel_locked(self, client_uuid: str) -> bool:
+        for parent_uuid, waiting in list(self._dependents.items()):
+            remaining = [dependent for dependent in waiting if dependent[0] != client_uuid]
+            if len(remaining) != len(waiting):
+                self._dependents[parent_uuid] = remaining
+                return True
+        future = self._futures.get(client_uuid)
+        if future is None or client_uuid in self._running:
+            return False
+        if not future.cancel():
+            # Already on a worker but not running yet; it drops itself once it sees the flag
+            self._cancelled.add(client_uuid)
+        self._futures.pop(client_uuid, None)
+        if client_uuid in self._pending:
+            self._pending.remove(client_uuid)
+        return True
     
     def is_running(self, client_uuid: str) -> bool:
         with self._lock:
-            return client_uuid in self._threads and self._threads[client_uuid].is_alive()
+            return client_uuid in self._running
+    
+    def is_waiting(self, client_uuid: str) -> bool:
+        with self._lock:
+            return any(dependent[0] == client_uuid for waiting in self._dependents.values() for dependent in waiting)
+    
+    def is_queued(self, client_uuid: str) -> bool:
+        with self._lock:
+            return client_uuid in self._pending
+    
+    def queue_position(self, client_uuid: str) -> Optional[int]:
+        with self._lock:
+            try:
+                return self._pending.index(client_uuid) + 1
+            except ValueError:
+                return None
+    
+    def running_count(self) -> int:
+        with self._lock:
+            return len(self._running)
+    
+    def queued_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
 
 
 task_manager = BackgroundTaskManager()
+bind_job_gauges(task_manager.running_count, task_manager.queued_count)
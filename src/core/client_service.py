@@ -1,33 +1,144 @@
+import base64
+import hashlib
 import json
-from typing import Optional, List
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.orm import Session
-from src.core.database import Client, ClientStatusEnum
-from src.models.models import ClientRegistrationRequest, ClientStatus, TerraformOutputs
+from src.core.database import Client, ClientListVersion, ClientOutputs, ClientStatusEnum
+from src.core.event_bus import event_bus
+from src.core.metrics import record_outcome
+from src.models.models import BatchRegistrationItem, ClientListItem, ClientRegistrationRequest, ClientStatus, ClientStatusResponse, DeploymentProgress, PlanSummary, TerraformOutputs
+
+
+# Fields a caller can select with ?fields= on the list and status endpoints
+LIST_FIELDS = tuple(ClientListItem.model_fields)
+STATUS_FIELDS = tuple(ClientStatusResponse.model_fields)
+
+# Built once; the list endpoint maps a status per row
+API_STATUS = {
+    ClientStatusEnum.PENDING: ClientStatus.PENDING,
+    ClientStatusEnum.QUEUED: ClientStatus.QUEUED,
+    ClientStatusEnum.IN_PROGRESS: ClientStatus.IN_PROGRESS,
+    ClientStatusEnum.COMPLETED: ClientStatus.COMPLETED,
+    ClientStatusEnum.FAILED: ClientStatus.FAILED,
+}
 
 
 class ClientService:
     @staticmethod
-    def create_client(db: Session, request: ClientRegistrationRequest) -> Client:
-        if ClientService.get_client_by_uuid(db, request.client_uuid):
-            raise ValueError(f"Client with UUID {request.client_uuid} already exists")
-        
-        job_id = f"job-{request.client_uuid}"
-        client = Client(
+    def new_client(request: ClientRegistrationRequest) -> Client:
+        return Client(
             uuid=request.client_uuid,
             client_name=request.client_name,
-            job_id=job_id,
+            job_id=f"job-{request.client_uuid}",
             status=ClientStatusEnum.PENDING,
             environment=request.environment,
             region=request.region,
             parent_uuid=request.parent_uuid,
-            terraform_outputs=None,
             error_message=None
         )
+    
+    @staticmethod
+    def create_client(db: Session, request: ClientRegistrationRequest) -> Client:
+        if ClientService.get_client_by_uuid(db, request.client_uuid):
+            raise ValueError(f"Client with UUID {request.client_uuid} already exists")
+        
+        client = ClientService.new_client(request)
         db.add(client)
         db.commit()
         db.refresh(client)
+        ClientService.publish_status("created", client)
         return client
     
+    @staticmethod
+    def create_client_batch(db: Session, requests: List[ClientRegistrationRequest]) -> Tuple[str, List[BatchRegistrationItem]]:
+        # Validate the whole batch up front, then insert every client in a single transaction
+        lookup = ClientService.batch_lookup_uuids(requests)
+        existing = {client.uuid: client for client in db.query(Client).filter(Client.uuid.in_(lookup)).all()}
+        batch_id, clients, items = ClientService.prepare_batch(requests, existing)
+        events = [(client.uuid, client.parent_uuid, ClientService.status_event_data(client)) for client in clients]
+        db.add_all(clients)
+        db.commit()
+        for client_uuid, parent_uuid, data in events:
+            event_bus.publish("created", client_uuid, parent_uuid, data)
+        return batch_id, items
+    
+    @staticmethod
+    def batch_lookup_uuids(requests: List[ClientRegistrationRequest]) -> set:
+        return {request.client_uuid for request in requests} | {request.parent_uuid for request in requests if request.parent_uuid}
+    
+    @staticmethod
+    def prepare_batch(requests: List[ClientRegistrationRequest],
+                      existing: Dict[str, Client]) -> Tuple[str, List[Client], List[BatchRegistrationItem]]:
+        # existing holds the already registered clients among the batch UUIDs and referenced parents
+        uuids = [request.client_uuid for request in requests]
+        duplicates = sorted(client_uuid for client_uuid, count in Counter(uuids).items() if count > 1)
+        if duplicates:
+            raise ValueError(f"Duplicate client UUIDs in batch: {', '.join(duplicates)}")
+        
+        already_registered = sorted(client_uuid for client_uuid in uuids if client_uuid in existing)
+        if already_registered:
+            raise ValueError(f"Clients already exist: {', '.join(already_registered)}")
+        
+        in_batch = {request.client_uuid: request for request in requests}
+        for request in requests:
+            if not request.parent_uuid:
+                continue
+            parent = in_batch.get(request.parent_uuid) or existing.get(request.parent_uuid)
+            if parent is None:
+                raise ValueError(f"Parent hospital not found for {request.client_uuid}: {request.parent_uuid}")
+            if parent.parent_uuid:
+                raise ValueError(f"Parent of {request.client_uuid} is itself a sub-hospital: {request.parent_uuid}")
+            if isinstance(parent, Client) and parent.status == ClientStatusEnum.FAILED:
+                raise ValueError(f"Parent hospital deployment failed: {request.parent_uuid}")
+        
+        batch_id = f"batch-{uuid.uuid4()}"
+        created_at = datetime.utcnow()
+        clients = [
+            Client(
+                uuid=request.client_uuid,
+                client_name=request.client_name,
+                job_id=f"job-{request.client_uuid}",
+                # Sub-hospitals stay pending until their parent completes
+                status=ClientStatusEnum.QUEUED if ClientService._parent_ready(request, existing) else ClientStatusEnum.PENDING,
+                environment=request.environment,
+                region=request.region,
+                parent_uuid=request.parent_uuid,
+                batch_id=batch_id,
+                created_at=created_at,
+                updated_at=created_at
+            )
+            for request in requests
+        ]
+        # Build the response before commit so it doesn't reload every expired instance
+        items = [ClientService.to_batch_item(client) for client in clients]
+        return batch_id, clients, items
+    
+    @staticmethod
+    def _parent_ready(request: ClientRegistrationRequest, existing: Dict[str, Client]) -> bool:
+        if not request.parent_uuid:
+            return True
+        parent = existing.get(request.parent_uuid)
+        return parent is not None and parent.status == ClientStatusEnum.COMPLETED
+    
+    @staticmethod
+    def get_batch_clients(db: Session, batch_id: str) -> List[Client]:
+        return db.query(Client).filter(Client.batch_id == batch_id).order_by(Client.created_at, Client.parent_uuid.isnot(None)).all()
+    
+    @staticmethod
+    def to_batch_item(client: Client) -> BatchRegistrationItem:
+        return BatchRegistrationItem(
+            client_uuid=client.uuid,
+            job_id=client.job_id,
+            status=ClientService.map_db_status_to_api_status(client.status),
+            status_url=f"/api/clients/{client.uuid}/status",
+            created_at=client.created_at,
+            parent_uuid=client.parent_uuid
+        )
+    
     @staticmethod
     def get_sub_hospitals(db: Session, parent_uuid: str) -> List[Client]:
         return db.query(Client).filter(Client.parent_uuid == parent_uuid).order_by(Client.created_at.desc()).all()
@@ -45,42 +156,295 @@ class ClientService:
         return db.query(Client).order_by(Client.created_at.desc()).all()
     
     @staticmethod
-    def update_client_status(db: Session, client_uuid: str, status: ClientStatusEnum, error_message: Optional[str] = None) -> Optional[Client]:
+    def encode_list_cursor(created_at: datetime, client_uuid: str) -> str:
+        payload = json.dumps([created_at.isoformat(), client_uuid], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def decode_list_cursor(cursor: str) -> Tuple[datetime, str]:
+        try:
+            created_at, client_uuid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            return datetime.fromisoformat(created_at), str(client_uuid)
+        except Exception:
+            raise ValueError("Invalid cursor")
+    
+    @staticmethod
+    def parse_fields(fields: Optional[str], allowed: Tuple[str, ...]) -> List[str]:
+        # Comma-separated response fields; returned in model order so equal selections share an ETag
+        if not fields or not fields.strip():
+            return list(allowed)
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}")
+        return [field for field in allowed if field in requested]
+    
+    @staticmethod
+    def _client_column(field: str):
+        return Client.uuid if field == "client_uuid" else getattr(Client, field)
+    
+    @staticmethod
+    def list_page_statement(limit: int, cursor: Optional[str] = None, fields: Optional[List[str]] = None):
+        # Keyset pagination on (created_at, uuid), newest first. Only the requested columns, plus the
+        # cursor columns, are loaded, so a page costs the same however large the fleet is.
+        fields = fields or list(LIST_FIELDS)
+        statement = select(Client.uuid, Client.created_at, *(
+            ClientService._client_column(field) for field in fields if field not in ("client_uuid", "created_at")
+        ))
+        if cursor:
+            created_at, client_uuid = ClientService.decode_list_cursor(cursor)
+            statement = statement.where(or_(
+                Client.created_at < created_at,
+                and_(Client.created_at == created_at, Client.uuid < client_uuid)
+            ))
+        return statement.order_by(Client.created_at.desc(), Client.uuid.desc()).limit(limit + 1)
+    
+    @staticmethod
+    def to_list_page(rows: List[Any], limit: int, fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        # Plain dicts in ClientListItem's shape, serialized directly by the route
+        fields = fields or list(LIST_FIELDS)
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = ClientService.encode_list_cursor(rows[-1].created_at, rows[-1].uuid)
+        items = []
+        for row in rows:
+            values = row._mapping
+            item = {field: values["uuid" if field == "client_uuid" else field] for field in fields}
+            if "status" in item:
+                item["status"] = ClientService.map_db_status_to_api_status(item["status"]).value
+            items.append(item)
+        return items, next_cursor
+    
+    @staticmethod
+    def list_clients_page(db: Session, limit: int, cursor: Optional[str] = None,
+                          fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        rows = db.execute(ClientService.list_page_statement(limit, cursor, fields)).all()
+        return ClientService.to_list_page(rows, limit, fields)
+    
+    @staticmethod
+    def status_statement(client_uuid: str, fields: List[str]):
+        # updated_at is always loaded for the ETag; outputs are joined only when asked for
+        columns = [Client.updated_at] + [
+            ClientService._client_column(field) for field in fields
+            if field not in ("updated_at", "queue_position", "terraform_outputs")
+        ]
+        statement = select(*columns)
+        if "terraform_outputs" in fields:
+            statement = statement.add_columns(ClientOutputs.client_uuid.label("outputs_client_uuid"), *(
+                getattr(ClientOutputs, field).label(f"outputs_{field}") for field in TerraformOutputs.model_fields
+            )).outerjoin(ClientOutputs, ClientOutputs.client_uuid == Client.uuid)
+        return statement.where(Client.uuid == client_uuid)
+    
+    @staticmethod
+    def to_status_fields(row: Any, fields: List[str], queue_position: Optional[int] = None) -> Dict[str, Any]:
+        # Plain dict in ClientStatusResponse's shape, limited to the requested fields
+        values = row._mapping
+        result = {}
+        for field in fields:
+            if field == "queue_position":
+                result[field] = queue_position
+            elif field == "terraform_outputs":
+                result[field] = {
+                    name: values[f"outputs_{name}"] for name in TerraformOutputs.model_fields
+                } if values["outputs_client_uuid"] else None
+            elif field == "progress":
+                progress = ClientService.parse_progress(values["progress"])
+                result[field] = progress.model_dump() if progress else None
+            elif field == "plan_summary":
+                plan_summary = ClientService.parse_plan_summary(values["plan_summary"])
+                result[field] = plan_summary.model_dump() if plan_summary else None
+            elif field == "status":
+                result[field] = ClientService.map_db_status_to_api_status(values["status"]).value
+            else:
+                result[field] = values["uuid" if field == "client_uuid" else field]
+        return result
+    
+    @staticmethod
+    def get_status_fields(db: Session, client_uuid: str, fields: List[str]) -> Optional[Any]:
+        return db.execute(ClientService.status_statement(client_uuid, fields)).first()
+    
+    @staticmethod
+    def count_clients(db: Session) -> int:
+        return db.query(func.count(Client.uuid)).scalar()
+    
+    @staticmethod
+    def get_list_version(db: Session) -> int:
+        return db.query(ClientListVersion.version).filter(ClientListVersion.id == 1).scalar() or 0
+    
+    @staticmethod
+    def get_client_updated_at(db: Session, client_uuid: str) -> Optional[datetime]:
+        return db.query(Client.updated_at).filter(Client.uuid == client_uuid).scalar()
+    
+    @staticmethod
+    def _etag(*parts: Any) -> str:
+        return '"' + hashlib.blake2b(":".join(str(part) for part in parts).encode(), digest_size=12).hexdigest() + '"'
+    
+    @staticmethod
+    def list_etag(version: int, limit: int, cursor: Optional[str], fields: Optional[List[str]] = None) -> str:
+        return ClientService._etag("list", version, limit, cursor or "", ",".join(fields or LIST_FIELDS))
+    
+    @staticmethod
+    def status_etag(client_uuid: str, updated_at: datetime, queue_position: Optional[int],
+                    fields: Optional[List[str]] = None) -> str:
+        # Every ORM write bumps updated_at; the queue position lives in memory, so it is part of the tag
+        return ClientService._etag("status", client_uuid, updated_at.isoformat(), queue_position, ",".join(fields or STATUS_FIELDS))
+    
+    @staticmethod
+    def update_client_status(db: Session, client_uuid: str, status: ClientStatusEnum, error_message: Optional[str] = None,
+                             operation: Optional[str] = None) -> Optional[Client]:
         client = ClientService.get_client_by_uuid(db, client_uuid)
         if client:
-            client.status = status
-            if error_message:
-                client.error_message = error_message
+            ClientService.apply_status(client, status, error_message, operation)
             db.commit()
             db.refresh(client)
+            ClientService.status_committed(client)
         return client
     
+    @staticmethod
+    def apply_status(client: Client, status: ClientStatusEnum, error_message: Optional[str], operation: Optional[str]) -> None:
+        client.status = status
+        if error_message:
+            client.error_message = error_message
+        if operation:
+            client.operation = operation
+        if status == ClientStatusEnum.COMPLETED:
+            client.resume_attempts = 0
+    
+    @staticmethod
+    def status_committed(client: Client) -> None:
+        ClientService.publish_status("status", client)
+        if client.status in (ClientStatusEnum.COMPLETED, ClientStatusEnum.FAILED):
+            record_outcome(client.operation, client.status.value, client.region, client.environment)
+    
+    @staticmethod
+    def delete_client(db: Session, client_uuid: str) -> bool:
+        client = ClientService.get_client_by_uuid(db, client_uuid)
+        if not client:
+            return False
+        parent_uuid = client.parent_uuid
+        db.delete(client)
+        db.commit()
+        event_bus.publish("deleted", client_uuid, parent_uuid)
+        return True
+    
     @staticmethod
     def update_client_outputs(db: Session, client_uuid: str, outputs: dict) -> Optional[Client]:
         client = ClientService.get_client_by_uuid(db, client_uuid)
         if client:
-            safe_outputs = {k: v for k, v in outputs.items() if k not in ['db_password', 'database_init_script']}
-            client.terraform_outputs = json.dumps(safe_outputs)
+            safe_outputs = ClientService.apply_outputs(client, outputs)
             db.commit()
             db.refresh(client)
+            event_bus.publish("outputs", client.uuid, client.parent_uuid, {"terraform_outputs": safe_outputs})
         return client
     
     @staticmethod
-    def parse_terraform_outputs(outputs_json: Optional[str]) -> Optional[TerraformOutputs]:
-        if not outputs_json:
+    def safe_outputs(outputs: dict) -> dict:
+        return {k: v for k, v in outputs.items() if k not in ['db_password', 'database_init_script']}
+    
+    @staticmethod
+    def split_outputs(outputs: dict) -> Tuple[Dict[str, Optional[str]], Dict[str, Any]]:
+        # Known TerraformOutputs fields get a column each (scalars stored as text, like the API
+        # returns them); everything else, and any structured value, goes to the overflow
+        known = {field: None for field in TerraformOutputs.model_fields}
+        extra = {}
+        for key, value in outputs.items():
+            if key in known and not isinstance(value, (dict, list)):
+                known[key] = None if value is None else str(value)
+            else:
+                extra[key] = value
+        return known, extra
+    
+    @staticmethod
+    def apply_outputs(client: Client, outputs: dict) -> dict:
+        # Parsed once here, on write, so reads are plain column lookups
+        safe_outputs = ClientService.safe_outputs(outputs)
+        known, extra = ClientService.split_outputs(safe_outputs)
+        if client.outputs is None:
+            client.outputs = ClientOutputs(client_uuid=client.uuid)
+        for field, value in known.items():
+            setattr(client.outputs, field, value)
+        client.outputs.extra = json.dumps(extra) if extra else None
+        # The outputs live in another table; touch the client so its status ETag changes
+        client.updated_at = datetime.utcnow()
+        return safe_outputs
+    
+    @staticmethod
+    def update_client_engine(db: Session, client_uuid: str, engine: str) -> Optional[Client]:
+        client = ClientService.get_client_by_uuid(db, client_uuid)
+        if client:
+            client.provisioning_engine = engine
+            db.commit()
+            db.refresh(client)
+        return client
+    
+    @staticmethod
+    def update_client_progress(db: Session, client_uuid: str, progress: dict) -> Optional[Client]:
+        client = ClientService.get_client_by_uuid(db, client_uuid)
+        if client:
+            client.progress = json.dumps(progress)
+            db.commit()
+            event_bus.publish("progress", client_uuid, client.parent_uuid, {"progress": progress})
+        return client
+    
+    @staticmethod
+    def update_client_plan_summary(db: Session, client_uuid: str, plan_summary: dict) -> Optional[Client]:
+        client = ClientService.get_client_by_uuid(db, client_uuid)
+        if client:
+            client.plan_summary = json.dumps(plan_summary)
+            db.commit()
+            event_bus.publish("plan", client_uuid, client.parent_uuid, {"plan_summary": plan_summary})
+        return client
+    
+    @staticmethod
+    def parse_plan_summary(plan_summary_json: Optional[str]) -> Optional[PlanSummary]:
+        if not plan_summary_json:
             return None
         try:
-            outputs_dict = json.loads(outputs_json)
-            return TerraformOutputs(**outputs_dict)
+            return PlanSummary(**json.loads(plan_summary_json))
         except Exception:
             return None
     
     @staticmethod
-    def map_db_status_to_api_status(db_status: ClientStatusEnum) -> ClientStatus:
-        mapping = {
-            ClientStatusEnum.PENDING: ClientStatus.PENDING,
-            ClientStatusEnum.IN_PROGRESS: ClientStatus.IN_PROGRESS,
-            ClientStatusEnum.COMPLETED: ClientStatus.COMPLETED,
-            ClientStatusEnum.FAILED: ClientStatus.FAILED,
+    def build_client_info(client: Client) -> Dict[str, Any]:
+        return {
+            "client_name": client.client_name,
+            "environment": client.environment,
+            "region": client.region,
+            "parent_uuid": client.parent_uuid,
+            "created_date": client.created_at.strftime("%Y-%m-%d") if client.created_at else None
+        }
+    
+    @staticmethod
+    def parse_progress(progress_json: Optional[str]) -> Optional[DeploymentProgress]:
+        if not progress_json:
+            return None
+        try:
+            return DeploymentProgress(**json.loads(progress_json))
+        except Exception:
+            return None
+    
+    @staticmethod
+    def status_event_data(client: Client) -> Dict[str, Any]:
+        return {
+            "client_name": client.client_name,
+            "status": ClientService.map_db_status_to_api_status(client.status).value,
+            "operation": client.operation,
+            "error_message": client.error_message,
+            "updated_at": client.updated_at.isoformat() if client.updated_at else None
         }
-        return mapping.get(db_status, ClientStatus.PENDING)
+    
+    @staticmethod
+    def publish_status(event_type: str, client: Client) -> None:
+        event_bus.publish(event_type, client.uuid, client.parent_uuid, ClientService.status_event_data(client))
+    
+    @staticmethod
+    def to_terraform_outputs(outputs: Optional[ClientOutputs]) -> Optional[TerraformOutputs]:
+        if outputs is None:
+            return None
+        # Columns were validated when written, so skip re-validation
+        return TerraformOutputs.model_construct(**{field: getattr(outputs, field) for field in TerraformOutputs.model_fields})
+    
+    @staticmethod
+    def map_db_status_to_api_status(db_status: ClientStatusEnum) -> ClientStatus:
+        return API_STATUS.get(db_status, ClientStatus.PENDING)
@@ -3,24 +3,29 @@ Database configuration and models using SQLAlchemy.
 """
 import logging
 from datetime import datetime
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Enum, inspect, text
+from sqlalchemy import Column, String, DateTime, Text, Enum, Integer, BigInteger, Index, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import deferred, relationship, sessionmaker
 import enum
 
 from src.config.settings import settings
+from src.core.db_engine import create_configured_async_engine, create_configured_engine
+from src.core.migrations import run_migrations
 
 logger = logging.getLogger(__name__)
 
-# Create database engine
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+# Create database engine (WAL, busy timeout and a bounded, instrumented pool for SQLite files)
+engine = create_configured_engine(settings.database_url)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine over the same database for the request path; background workers keep SessionLocal.
+# Objects stay loaded after commit, since an expired attribute cannot lazy-load outside a greenlet.
+async_engine = create_configured_async_engine(settings.database_url)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -28,6 +33,7 @@ Base = declarative_base()
 class ClientStatusEnum(enum.Enum):
     """Enum for client deployment status."""
     PENDING = "pending"
+    QUEUED = "queued"
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
@@ -43,30 +49,72 @@ class Client(Base):
     status = Column(Enum(ClientStatusEnum), default=ClientStatusEnum.PENDING, nullable=False)
     environment = Column(String(20), nullable=False)
     region = Column(String(50), nullable=False)
-    parent_uuid = Column(String(36), nullable=True, index=True)  # For sub-hospitals
-    terraform_outputs = Column(Text, nullable=True)  # JSON string
+    parent_uuid = Column(String(36), nullable=True)  # For sub-hospitals
+    batch_id = Column(String(50), nullable=True, index=True)  # Set for clients registered via register:batch
+    provisioning_engine = Column(String(20), nullable=True)  # Sub-hospital provisioner; NULL means terraform
+    operation = Column(String(20), nullable=True)  # "deploy" or "destroy": what the last IN_PROGRESS run was doing
+    resume_attempts = Column(Integer, default=0, nullable=False)  # Restarts survived by the current deployment
+    terraform_outputs = deferred(Column(Text, nullable=True))  # Legacy JSON blob, no longer maintained; read client_outputs (cleared by migration 5)
+    progress = Column(Text, nullable=True)  # JSON string, per-resource apply progress
+    plan_summary = Column(Text, nullable=True)  # JSON string, add/change/destroy counts of the last plan
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    outputs = relationship("ClientOutputs", uselist=False, lazy="joined", cascade="all, delete-orphan")
+    
+    # Kept in step with the migrations that create them on existing databases
+    __table_args__ = (
+        Index('ix_clients_created_at_uuid', 'created_at', 'uuid'),
+        Index('ix_clients_parent_uuid_created_at', 'parent_uuid', 'created_at'),
+        Index('ix_clients_status_created_at', 'status', 'created_at'),
+    )
+
+
+class ClientOutputs(Base):
+    """Terraform outputs of a client, one column per TerraformOutputs field."""
+    __tablename__ = "client_outputs"
+    
+    client_uuid = Column(String(36), ForeignKey("clients.uuid", ondelete="CASCADE"), primary_key=True)
+    db_instance_name = Column(String(255), nullable=True)
+    db_private_ip = Column(String(255), nullable=True)
+    db_port = Column(String(255), nullable=True)
+    database_name = Column(String(255), nullable=True)
+    db_username = Column(String(255), nullable=True)
+    connection_uri = Column(Text, nullable=True)
+    private_bucket_name = Column(String(255), nullable=True)
+    public_bucket_name = Column(String(255), nullable=True)
+    secret_name = Column(String(255), nullable=True)
+    cluster_id = Column(String(255), nullable=True)
+    environment = Column(String(255), nullable=True)
+    deployment_region = Column(String(255), nullable=True)
+    extra = Column(Text, nullable=True)  # JSON object of the outputs without a column of their own
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class Workspace(Base):
+    """Disk usage index of client workspaces under the deployments path."""
+    __tablename__ = "workspaces"
+    
+    client_uuid = Column(String(36), primary_key=True)
+    size_bytes = Column(BigInteger, default=0, nullable=False)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    evicted_at = Column(DateTime, nullable=True)  # Set while the directory is removed; state stays in the backend
+
+
+class ClientListVersion(Base):
+    """Counter bumped by triggers whenever a column shown in the client list changes."""
+    __tablename__ = "client_list_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
 
 
 def init_db():
     """Initialize database tables."""
     Base.metadata.create_all(bind=engine)
-    
-    # Add parent_uuid column if it doesn't exist (migration)
-    try:
-        inspector = inspect(engine)
-        if 'clients' in inspector.get_table_names():
-            columns = [col['name'] for col in inspector.get_columns('clients')]
-            
-            if 'parent_uuid' not in columns:
-                with engine.connect() as conn:
-                    conn.execute(text('ALTER TABLE clients ADD COLUMN parent_uuid VARCHAR(36)'))
-                    conn.commit()
-                logger.info("Added parent_uuid column to clients table")
-    except Exception as e:
-        logger.warning(f"Could not check/add parent_uuid column: {e}")
+    applied = run_migrations(engine)
+    if applied:
+        logger.info(f"Schema migrated to version {applied[-1]}")
 
 
 def get_db():
@@ -77,3 +125,9 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """Dependency for getting async database sessions."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
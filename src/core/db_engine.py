@@ -0,0 +1,104 @@
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from src.config.settings import settings
+from src.core.metrics import bind_pool_gauges, observe_pool_wait, record_pool_timeout
+
+
+class _TimedCheckout:
+    # Times every checkout, so waits for a free connection show up in db_pool_wait_seconds
+    engine_label = "sync"
+
+    def _do_get(self):
+        started = time.monotonic()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            record_pool_timeout(self.engine_label)
+            raise
+        finally:
+            observe_pool_wait(self.engine_label, time.monotonic() - started)
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    engine_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def sqlite_pragmas() -> list:
+    # WAL lets API reads run while a deployment thread writes; busy_timeout makes writers
+    # wait for the lock instead of failing with "database is locked"
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}",
+    ]
+
+
+def is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+
+def _set_pragmas_on_connect(engine: Engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in sqlite_pragmas():
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_pool_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+
+
+def create_configured_engine(url: str) -> Engine:
+    if not is_file_sqlite(url):
+        return create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": settings.sqlite_busy_timeout_ms / 1000},
+        poolclass=InstrumentedQueuePool,
+        **_pool_options()
+    )
+    _set_pragmas_on_connect(engine)
+    bind_pool_gauges("sync", engine.pool.checkedout, lambda: settings.db_pool_size + settings.db_pool_max_overflow)
+    return engine
+
+
+def async_url(url: str) -> str:
+    # The async engine reads the same database through aiosqlite
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.get_driver_name() != "aiosqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_configured_async_engine(url: str) -> AsyncEngine:
+    if not is_file_sqlite(url):
+        return create_async_engine(async_url(url))
+
+    engine = create_async_engine(
+        async_url(url),
+        connect_args={"timeout": settings.sqlite_busy_timeout_ms / 1000},
+        poolclass=InstrumentedAsyncQueuePool,
+        **_pool_options()
+    )
+    _set_pragmas_on_connect(engine.sync_engine)
+    bind_pool_gauges("async", engine.sync_engine.pool.checkedout, lambda: settings.db_pool_size + settings.db_pool_max_overflow)
+    return engine
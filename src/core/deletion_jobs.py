@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from src.core.database import AsyncSessionLocal, Client, ClientStatusEnum
+from src.core.async_client_service import AsyncClientService
+from src.core.async_terraform_service import AsyncTerraformService
+from src.core.metrics import record_outcome
+from src.core.services.sub_provisioner import TerraformSubProvisioner, get_provisioner
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionJobManager:
+    # Cascade deletes run as asyncio tasks on the API event loop. Sub-hospitals are destroyed
+    # concurrently (bounded by max_concurrent_destroys across all jobs); the parent is destroyed
+    # only once every sub-hospital is gone. Database writes go through the async session so the
+    # loop never waits on SQLite. Finished jobs are kept for deletion_job_ttl seconds.
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._active: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @staticmethod
+    def _step(client: Client) -> Dict[str, Any]:
+        return {
+            "client_uuid": client.uuid,
+            "client_name": client.client_name,
+            "status": "pending",
+            "error_message": None,
+            "started_at": None,
+            "finished_at": None
+        }
+
+    def start(self, client: Client, sub_hospitals: List[Client]) -> Dict[str, Any]:
+        # Every client a job covers is claimed, so a sub-hospital can't be deleted twice by overlapping jobs
+        covered = [client.uuid, *(sub_hospital.uuid for sub_hospital in sub_hospitals)]
+        for client_uuid in covered:
+            if client_uuid in self._active:
+                raise ValueError(f"Deletion already in progress for client {client_uuid}: job {self._active[client_uuid]}")
+
+        self._prune()
+        job_id = f"del-{uuid.uuid4()}"
+        job = {
+            "job_id": job_id,
+            "client_uuid": client.uuid,
+            "status": "pending",
+            "created_at": datetime.utcnow(),
+            "finished_at": None,
+            "error_message": None,
+            "sub_hospitals": [self._step(sub_hospital) for sub_hospital in sub_hospitals],
+            "parent": self._step(client)
+        }
+        # Remember pre-delete statuses: a client whose deployment already failed may be deleted
+        # even if its destroy fails too, and a parent kept alive by a failed child gets its status back.
+        original_status = {c.uuid: c.status for c in [client, *sub_hospitals]}
+        engines = {c.uuid: (c.provisioning_engine, AsyncClientService.build_client_info(c)) for c in [client, *sub_hospitals]}
+
+        self._jobs[job_id] = job
+        for client_uuid in covered:
+            self._active[client_uuid] = job_id
+        self._tasks[job_id] = asyncio.create_task(self._run(job, original_status, engines))
+        return job
+
+    async def _destroy_step(self, step: Dict[str, Any], original_status: Dict[str, ClientStatusEnum],
+                            engines: Dict[str, Tuple[Optional[str], Dict[str, Any]]]) -> bool:
+        client_service = AsyncClientService()
+        engine, client_info = engines[step["client_uuid"]]
+        async with self._get_semaphore():
+            step["status"] = "destroying"
+            step["started_at"] = datetime.utcnow()
+            if engine and engine != TerraformSubProvisioner.engine:
+                provisioner = get_provisioner(engine)
+                success, error_message = await asyncio.to_thread(provisioner.destroy, step["client_uuid"], client_info)
+            else:
+                success, error_message = await AsyncTerraformService().destroy_client_infrastructure_async(step["client_uuid"], client_info)
+        step["finished_at"] = datetime.utcnow()
+
+        async with AsyncSessionLocal() as db:
+            if success or original_status[step["client_uuid"]] == ClientStatusEnum.FAILED:
+                await client_service.delete_client(db, step["client_uuid"])
+                step["status"] = "destroyed" if success else "deleted"
+                step["error_message"] = error_message
+                record_outcome("destroy", step["status"], client_info.get("region"), client_info.get("environment"))
+                return True
+            step["status"] = "failed"
+            step["error_message"] = error_message
+            await client_service.update_client_status(
+                db, step["client_uuid"], ClientStatusEnum.FAILED,
+                f"Infrastructure destruction failed: {error_message}"
+            )
+            return False
+
+    async def _run(self, job: Dict[str, Any], original_status: Dict[str, ClientStatusEnum],
+                   engines: Dict[str, Tuple[Optional[str], Dict[str, Any]]]) -> None:
+        client_service = AsyncClientService()
+        parent = job["parent"]
+        try:
+            async with AsyncSessionLocal() as db:
+                for step in [*job["sub_hospitals"], parent]:
+                    await client_service.update_client_status(db, step["client_uuid"], ClientStatusEnum.IN_PROGRESS, operation="destroy")
+            job["status"] = "running"
+
+            results = await asyncio.gather(
+                *(self._destroy_step(step, original_status, engines) for step in job["sub_hospitals"]),
+                return_exceptions=True
+            )
+            failed = [step for step, result in zip(job["sub_hospitals"], results) if result is not True]
+            async with AsyncSessionLocal() as db:
+                for step, result in zip(job["sub_hospitals"], results):
+                    if isinstance(result, Exception):
+                        step["status"] = "failed"
+                        step["error_message"] = str(result)
+                        await client_service.update_client_status(db, step["client_uuid"], ClientStatusEnum.FAILED, str(result))
+
+            if failed:
+                parent["status"] = "skipped"
+                parent["error_message"] = f"{len(failed)} sub-hospital(s) failed to destroy"
+                async with AsyncSessionLocal() as db:
+                    await client_service.update_client_status(db, parent["client_uuid"], original_status[parent["client_uuid"]])
+                job["status"] = "failed"
+                job["error_message"] = parent["error_message"]
+                return
+
+            if await self._destroy_step(parent, original_status, engines):
+                job["status"] = "completed"
+            else:
+                job["status"] = "failed"
+                job["error_message"] = parent["error_message"]
+        except Exception as e:
+            logger.exception(f"Deletion job {job['job_id']} failed")
+            job["status"] = "failed"
+            job["error_message"] = str(e)
+        finally:
+            job["finished_at"] = datetime.utcnow()
+            for step in [*job["sub_hospitals"], parent]:
+                self._active.pop(step["client_uuid"], None)
+            self._tasks.pop(job["job_id"], None)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.max_concurrent_destroys)
+        return self._semaphore
+
+    def _prune(self) -> None:
+        # Finished jobs stay queryable for a while, then are dropped so the registry doesn't grow forever
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.deletion_job_ttl)
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["finished_at"] and job["finished_at"] < cutoff]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def active_job(self, client_uuid: str) -> Optional[str]:
+        return self._active.get(client_uuid)
+
+
+deletion_manager = DeletionJobManager()
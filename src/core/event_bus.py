@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.config.settings import settings
+from src.core.metrics import bind_subscriber_gauge
+
+
+class Subscription:
+    # One SSE stream; events are handed to its event loop from whichever thread published them
+    def __init__(self, loop: asyncio.AbstractEventLoop, client_uuid: Optional[str], parent_uuid: Optional[str]):
+        self.loop = loop
+        self.client_uuid = client_uuid
+        self.parent_uuid = parent_uuid
+        self.queue: asyncio.Queue = asyncio.Queue(settings.event_subscriber_queue_size)
+        self.overflowed = False
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.client_uuid and event["client_uuid"] != self.client_uuid:
+            return False
+        if self.parent_uuid and self.parent_uuid not in (event["client_uuid"], event["parent_uuid"]):
+            return False
+        return True
+
+    def deliver(self, event: Dict[str, Any]) -> None:
+        # A subscriber that cannot keep up is closed after draining and resumes from its last event id
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBus:
+    # In-process pub/sub for client changes. Event ids are "<epoch>-<sequence>": the epoch changes on
+    # restart, so a stale Last-Event-ID is detected and the subscriber is told to reload instead.
+    def __init__(self, history_size: int):
+        self._lock = threading.Lock()
+        self._epoch = uuid.uuid4().hex[:8]
+        self._sequence = 0
+        self._history: deque = deque(maxlen=history_size)
+        self._subscribers: Set[Subscription] = set()
+
+    def publish(self, event_type: str, client_uuid: str, parent_uuid: Optional[str] = None,
+                data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._sequence += 1
+            event = {
+                "id": f"{self._epoch}-{self._sequence}",
+                "type": event_type,
+                "client_uuid": client_uuid,
+                "parent_uuid": parent_uuid,
+                "data": data or {},
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+            }
+            self._history.append((self._sequence, event))
+            subscribers = [subscription for subscription in self._subscribers if subscription.matches(event)]
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+        return event
+
+    def _replay(self, subscription: Subscription, last_event_id: str) -> Optional[List[Dict[str, Any]]]:
+        # None means the events after last_event_id are no longer known
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self._epoch or not sequence.isdigit() or int(sequence) > self._sequence:
+            return None
+        oldest = self._history[0][0] if self._history else self._sequence + 1
+        if int(sequence) < oldest - 1:
+            return None
+        return [event for seq, event in self._history if seq > int(sequence) and subscription.matches(event)]
+
+    def subscribe(self, client_uuid: Optional[str] = None, parent_uuid: Optional[str] = None,
+                  last_event_id: Optional[str] = None) -> Tuple[Subscription, Optional[List[Dict[str, Any]]]]:
+        # Registering and reading the backlog under one lock means no event is missed or sent twice
+        subscription = Subscription(asyncio.get_running_loop(), client_uuid, parent_uuid)
+        with self._lock:
+            self._subscribers.add(subscription)
+            replay = self._replay(subscription, last_event_id) if last_event_id else []
+        return subscription, replay
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+event_bus = EventBus(settings.event_history_size)
+bind_subscriber_gauge(event_bus.subscriber_count)
@@ -0,0 +1,87 @@
+import functools
+import time
+from typing import Callable, Optional, Tuple
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Terraform phases run from seconds to tens of minutes; HTTP requests from milliseconds to seconds.
+PHASE_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 900, 1200, 1800, 3600)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+
+PHASE_DURATION = Histogram(
+    "provisioning_phase_duration_seconds",
+    "Duration of each provisioning phase (workspace, init, plan, apply, outputs, create_tables, destroy)",
+    ["phase"],
+    buckets=PHASE_BUCKETS
+)
+OUTCOMES = Counter(
+    "provisioning_outcomes_total",
+    "Finished deployments and deletions by final status",
+    ["operation", "status", "region", "environment"]
+)
+JOBS_RUNNING = Gauge("deployment_jobs_running", "Deployments currently running on a worker")
+JOBS_QUEUED = Gauge("deployment_jobs_queued", "Deployments waiting for a worker or for admission")
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS
+)
+EVENT_SUBSCRIBERS = Gauge("event_stream_subscribers", "Open /api/events streams")
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the database pool",
+    ["engine"],
+    buckets=POOL_WAIT_BUCKETS
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that gave up waiting for a free connection", ["engine"])
+DB_POOL_CHECKED_OUT = Gauge("db_pool_connections_checked_out", "Connections currently checked out of the pool", ["engine"])
+DB_POOL_CAPACITY = Gauge("db_pool_connections_capacity", "Pool size plus allowed overflow", ["engine"])
+
+
+def observe_phase(phase: str, seconds: float) -> None:
+    PHASE_DURATION.labels(phase).observe(seconds)
+
+
+def timed_phase(phase: str) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe_phase(phase, time.monotonic() - started)
+        return wrapper
+    return decorator
+
+
+def record_outcome(operation: Optional[str], status: str, region: Optional[str], environment: Optional[str]) -> None:
+    OUTCOMES.labels(operation or "deploy", status, region or "unknown", environment or "unknown").inc()
+
+
+def bind_job_gauges(running_count: Callable[[], int], queued_count: Callable[[], int]) -> None:
+    # Read on scrape, so the task manager needs no extra bookkeeping
+    JOBS_RUNNING.set_function(running_count)
+    JOBS_QUEUED.set_function(queued_count)
+
+
+def bind_subscriber_gauge(subscriber_count: Callable[[], int]) -> None:
+    EVENT_SUBSCRIBERS.set_function(subscriber_count)
+
+
+def observe_pool_wait(engine: str, seconds: float) -> None:
+    DB_POOL_WAIT.labels(engine).observe(seconds)
+
+
+def record_pool_timeout(engine: str) -> None:
+    DB_POOL_TIMEOUTS.labels(engine).inc()
+
+
+def bind_pool_gauges(engine: str, checked_out: Callable[[], int], capacity: Callable[[], int]) -> None:
+    DB_POOL_CHECKED_OUT.labels(engine).set_function(checked_out)
+    DB_POOL_CAPACITY.labels(engine).set_function(capacity)
+
+
+def render() -> Tuple[bytes, str]:
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,226 @@
+import argparse
+import json
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+# TerraformOutputs fields, frozen here so migration 4 keeps the schema it was written for
+OUTPUT_COLUMNS = [
+    "db_instance_name", "db_private_ip", "db_port", "database_name", "db_username", "connection_uri",
+    "private_bucket_name", "public_bucket_name", "secret_name", "cluster_id", "environment", "deployment_region",
+]
+
+# Each step must be idempotent: a database created by create_all already has the latest columns and indexes,
+# and two workers starting together may both run a step before either records it.
+
+
+def _add_columns(conn: Connection, table: str, columns: List[Tuple[str, str]]) -> None:
+    existing = {column['name'] for column in inspect(conn).get_columns(table)}
+    for name, column_type in columns:
+        if name not in existing:
+            conn.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}'))
+            logger.info(f"Added {name} column to {table} table")
+
+
+def _create_index(conn: Connection, name: str, table: str, columns: List[str]) -> None:
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})'))
+
+
+def _baseline_columns(conn: Connection) -> None:
+    # Columns and indexes added to clients before migrations were versioned
+    _add_columns(conn, 'clients', [
+        ('parent_uuid', 'VARCHAR(36)'),
+        ('progress', 'TEXT'),
+        ('plan_summary', 'TEXT'),
+        ('batch_id', 'VARCHAR(50)'),
+        ('provisioning_engine', 'VARCHAR(20)'),
+        ('operation', 'VARCHAR(20)'),
+        ('resume_attempts', 'INTEGER NOT NULL DEFAULT 0'),
+    ])
+    _create_index(conn, 'ix_clients_batch_id', 'clients', ['batch_id'])
+
+
+def _clients_query_indexes(conn: Connection) -> None:
+    # Listing pages on (created_at, uuid); get_sub_hospitals filters parent_uuid and sorts by created_at;
+    # the reconciler filters status and sorts by created_at. The parent_uuid prefix makes its old index redundant.
+    _create_index(conn, 'ix_clients_created_at_uuid', 'clients', ['created_at', 'uuid'])
+    _create_index(conn, 'ix_clients_parent_uuid_created_at', 'clients', ['parent_uuid', 'created_at'])
+    _create_index(conn, 'ix_clients_status_created_at', 'clients', ['status', 'created_at'])
+    conn.execute(text('DROP INDEX IF EXISTS ix_clients_parent_uuid'))
+
+
+def _client_list_version(conn: Connection) -> None:
+    # Single-row counter bumped by triggers on every change to a listed column, so list ETags
+    # stay correct whichever process or code path writes the clients table
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS client_list_version (id INTEGER PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)'
+    ))
+    conn.execute(text('INSERT OR IGNORE INTO client_list_version (id, version) VALUES (1, 0)'))
+    bump = 'BEGIN UPDATE client_list_version SET version = version + 1 WHERE id = 1; END'
+    conn.execute(text(f'CREATE TRIGGER IF NOT EXISTS trg_clients_list_version_insert AFTER INSERT ON clients {bump}'))
+    conn.execute(text(f'CREATE TRIGGER IF NOT EXISTS trg_clients_list_version_delete AFTER DELETE ON clients {bump}'))
+    conn.execute(text(
+        'CREATE TRIGGER IF NOT EXISTS trg_clients_list_version_update '
+        'AFTER UPDATE OF client_name, status, environment, region, parent_uuid, created_at ON clients '
+        f'{bump}'
+    ))
+
+
+def _split_outputs_v4(outputs: dict) -> Tuple[dict, dict]:
+    # The split as of migration 4, against the frozen OUTPUT_COLUMNS rather than the live ClientService,
+    # so later changes to how outputs are stored don't change what this step writes
+    known = {name: None for name in OUTPUT_COLUMNS}
+    extra = {}
+    for key, value in outputs.items():
+        if key in known and not isinstance(value, (dict, list)):
+            known[key] = None if value is None else str(value)
+        else:
+            extra[key] = value
+    return known, extra
+
+
+def _client_outputs(conn: Connection) -> None:
+    # Terraform outputs move from the clients.terraform_outputs JSON blob to typed columns;
+    # existing blobs are split once here so reads never parse JSON again
+    columns = ", ".join(f"{name} {'TEXT' if name == 'connection_uri' else 'VARCHAR(255)'}" for name in OUTPUT_COLUMNS)
+    conn.execute(text(
+        'CREATE TABLE IF NOT EXISTS client_outputs (client_uuid VARCHAR(36) NOT NULL PRIMARY KEY '
+        f'REFERENCES clients (uuid) ON DELETE CASCADE, {columns}, extra TEXT, updated_at DATETIME NOT NULL)'
+    ))
+    select_batch = text(
+        'SELECT uuid, terraform_outputs, updated_at FROM clients WHERE terraform_outputs IS NOT NULL AND uuid > :after '
+        'AND uuid NOT IN (SELECT client_uuid FROM client_outputs) ORDER BY uuid LIMIT 1000'
+    )
+    insert = text(
+        f'INSERT INTO client_outputs (client_uuid, {", ".join(OUTPUT_COLUMNS)}, extra, updated_at) '
+        f'VALUES (:client_uuid, {", ".join(":" + name for name in OUTPUT_COLUMNS)}, :extra, :updated_at)'
+    )
+    # Keyset batches on uuid, so only one batch of blobs is held in memory at a time
+    backfilled, skipped, after = 0, 0, ""
+    while True:
+        rows = conn.execute(select_batch, {"after": after}).all()
+        if not rows:
+            break
+        after = rows[-1][0]
+        batch = []
+        for client_uuid, outputs_json, updated_at in rows:
+            try:
+                outputs = json.loads(outputs_json)
+            except ValueError:
+                outputs = None
+            if not isinstance(outputs, dict):
+                skipped += 1
+                continue
+            known, extra = _split_outputs_v4(outputs)
+            batch.append({"client_uuid": client_uuid, **known, "extra": json.dumps(extra) if extra else None, "updated_at": updated_at})
+        if batch:
+            conn.execute(insert, batch)
+            backfilled += len(batch)
+    logger.info(f"Backfilled terraform outputs of {backfilled} clients ({skipped} unreadable)")
+
+
+def _clear_legacy_outputs(conn: Connection) -> None:
+    # clients.terraform_outputs is no longer maintained once client_outputs exists, so a copy left behind
+    # would go stale on the next redeploy. Blobs that migration 4 could not read are kept for inspection.
+    result = conn.execute(text(
+        'UPDATE clients SET terraform_outputs = NULL WHERE terraform_outputs IS NOT NULL '
+        'AND uuid IN (SELECT client_uuid FROM client_outputs)'
+    ))
+    logger.info(f"Cleared legacy terraform outputs of {result.rowcount} clients")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "baseline_columns", _baseline_columns),
+    (2, "clients_query_indexes", _clients_query_indexes),
+    (3, "client_list_version", _client_list_version),
+    (4, "client_outputs", _client_outputs),
+    (5, "clear_legacy_outputs", _clear_legacy_outputs),
+]
+
+
+def _ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE IF NOT EXISTS schema_migrations '
+            '(version INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, applied_at DATETIME NOT NULL)'
+        ))
+
+
+def current_version(engine: Engine) -> int:
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        return conn.execute(text('SELECT COALESCE(MAX(version), 0) FROM schema_migrations')).scalar()
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    # Applies pending steps in order, recording each version in the same transaction as the step
+    applied = []
+    version = current_version(engine)
+    for step_version, name, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(
+                text('INSERT OR IGNORE INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)'),
+                {"version": step_version, "name": name, "applied_at": datetime.utcnow()}
+            )
+        logger.info(f"Applied schema migration {step_version} ({name})")
+        applied.append(step_version)
+    return applied
+
+
+def explain_query_plan(conn, query) -> List[str]:
+    # Plan detail lines for an ORM query or Core statement, e.g. "SEARCH clients USING INDEX ix_clients_status_created_at (status=?)"
+    statement = getattr(query, "statement", query)
+    dialect = conn.get_bind().dialect if hasattr(conn, "get_bind") else conn.dialect
+    compiled = statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return [row[-1] for row in rows]
+
+
+def uses_index(plan: List[str], index_name: str) -> bool:
+    return any(f"INDEX {index_name}" in line for line in plan)
+
+
+def hot_query_plans(db) -> dict:
+    # Plans of the ClientService queries the indexes above are meant for
+    from src.core.database import Client, ClientStatusEnum
+
+    now = datetime.utcnow()
+    queries = {
+        "list_clients_page": db.query(Client.uuid).order_by(Client.created_at.desc(), Client.uuid.desc()).limit(100),
+        "list_clients_page_cursor": db.query(Client.uuid).filter(Client.created_at < now)
+        .order_by(Client.created_at.desc(), Client.uuid.desc()).limit(100),
+        "get_sub_hospitals": db.query(Client).filter(Client.parent_uuid == "parent")
+        .order_by(Client.created_at.desc()),
+        "reconcile": db.query(Client).filter(Client.status == ClientStatusEnum.IN_PROGRESS)
+        .order_by(Client.created_at),
+        "get_batch_clients": db.query(Client).filter(Client.batch_id == "batch").order_by(Client.created_at),
+    }
+    return {name: explain_query_plan(db, query) for name, query in queries.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations and show the current version.")
+    parser.add_argument("--explain", action="store_true", help="Print query plans of the hot client queries")
+    args = parser.parse_args()
+
+    from src.core.database import SessionLocal, engine, init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    print(f"Schema version: {current_version(engine)} (latest {MIGRATIONS[-1][0]})")
+    if args.explain:
+        db = SessionLocal()
+        try:
+            for name, plan in hot_query_plans(db).items():
+                print(f"{name}:")
+                for line in plan:
+                    print(f"  {line}")
+        finally:
+            db.close()
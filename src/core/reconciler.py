@@ -0,0 +1,123 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from src.core.database import SessionLocal, Client, ClientStatusEnum
+from src.core.client_service import ClientService
+from src.core.background_tasks import task_manager
+from src.core.state_backend import StateBackend
+from src.core.terraform_service import TerraformService
+from src.core.services.sub_provisioner import TerraformSubProvisioner
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Reconciler:
+    # Runs once at startup. Jobs live in memory, so after a restart every QUEUED/IN_PROGRESS client
+    # (and every batch sub-hospital still PENDING on its parent) is orphaned. Recoverable clients are
+    # re-queued through the normal worker pool, which resumes from the existing workspace and state.
+    def __init__(self):
+        self.client_service = ClientService()
+        self.terraform_service = TerraformService()
+        self.state_backend = StateBackend()
+        self.last_result: Optional[Dict[str, Any]] = None
+
+    def _inspect(self, client: Client) -> Tuple[str, str]:
+        # Returns (action, reason) where action is "resume" or "fail"; runs in a worker thread
+        if client.operation == "destroy" or (client.operation is None and self._latest_log_name(client.uuid) == "destroy"):
+            return "fail", "Deletion was interrupted by a restart; infrastructure may be partially destroyed. Delete the client again to finish."
+
+        if client.resume_attempts >= settings.reconcile_max_resume_attempts:
+            return "fail", f"Deployment was interrupted by a restart {client.resume_attempts} times; not resuming again. Redeploy manually."
+
+        if client.provisioning_engine and client.provisioning_engine != TerraformSubProvisioner.engine:
+            # SDK provisioning is idempotent; it simply runs again
+            return "resume", "re-running provisioner"
+
+        workspace_path = self.terraform_service.get_workspace_path(client.uuid)
+        has_workspace = (workspace_path / "terraform.tfvars").exists() and (workspace_path / "backend.tf").exists()
+        try:
+            has_state = self.state_backend.state_exists(client.uuid)
+            if self.state_backend.release_stale_lock(client.uuid):
+                logger.warning(f"Released stale state lock for {client.uuid}")
+        except Exception as e:
+            if not has_workspace:
+                return "fail", f"Deployment was interrupted by a restart and its state could not be checked: {str(e)}"
+            has_state = None
+
+        if has_workspace:
+            return "resume", "resuming from existing workspace"
+        if has_state:
+            return "resume", "workspace missing; resuming from remote state"
+        return "resume", "no workspace or state yet; starting over"
+
+    def _latest_log_name(self, client_uuid: str) -> Optional[str]:
+        log_path = self.terraform_service.get_latest_log(client_uuid)
+        return log_path.stem if log_path is not None else None
+
+    def reconcile(self) -> Dict[str, Any]:
+        db = SessionLocal()
+        result: Dict[str, Any] = {"started_at": datetime.utcnow().isoformat(), "resumed": [], "requeued": [], "failed": []}
+        try:
+            orphans = db.query(Client).filter(
+                Client.status.in_([ClientStatusEnum.IN_PROGRESS, ClientStatusEnum.QUEUED, ClientStatusEnum.PENDING])
+            ).order_by(Client.created_at).all()
+            if not orphans:
+                self.last_result = result
+                return result
+
+            in_progress = [client for client in orphans if client.status == ClientStatusEnum.IN_PROGRESS]
+            with ThreadPoolExecutor(max_workers=settings.reconcile_concurrency, thread_name_prefix="reconcile") as executor:
+                decisions = list(executor.map(self._inspect, in_progress))
+
+            to_schedule: List[Client] = []
+            for client, (action, reason) in zip(in_progress, decisions):
+                if action == "fail":
+                    self.client_service.update_client_status(db, client.uuid, ClientStatusEnum.FAILED, reason)
+                    result["failed"].append({"client_uuid": client.uuid, "reason": reason})
+                    continue
+                client.resume_attempts = (client.resume_attempts or 0) + 1
+                self.client_service.update_client_status(db, client.uuid, ClientStatusEnum.QUEUED)
+                result["resumed"].append({"client_uuid": client.uuid, "reason": reason})
+                to_schedule.append(client)
+
+            for client in orphans:
+                if client in to_schedule:
+                    continue
+                if client.status == ClientStatusEnum.QUEUED:
+                    result["requeued"].append({"client_uuid": client.uuid, "reason": "queued before restart"})
+                    to_schedule.append(client)
+                elif client.status == ClientStatusEnum.PENDING:
+                    result["requeued"].append({"client_uuid": client.uuid, "reason": "not yet scheduled before restart"})
+                    to_schedule.append(client)
+
+            # Interrupted jobs go first, then the queue in its original order, with every hospital ahead
+            # of the sub-hospitals that wait on it. The worker pool and admission control bound how many
+            # of them actually run at once.
+            to_schedule.sort(key=lambda client: client.parent_uuid is not None)
+            for client in to_schedule:
+                client_info = self.client_service.build_client_info(client)
+                try:
+                    if client.parent_uuid:
+                        task_manager.deploy_after_parent(client.uuid, client.parent_uuid, client_info)
+                    else:
+                        task_manager.deploy_hospital(client.uuid, client_info)
+                except ValueError:
+                    pass
+        except Exception as e:
+            logger.exception("Startup reconciliation failed")
+            result["error"] = str(e)
+        finally:
+            db.close()
+
+        result["finished_at"] = datetime.utcnow().isoformat()
+        self.last_result = result
+        logger.warning(
+            f"Startup reconciliation: {len(result['resumed'])} resumed, "
+            f"{len(result['requeued'])} re-queued, {len(result['failed'])} marked failed"
+        )
+        return result
+
+
+reconciler = Reconciler()
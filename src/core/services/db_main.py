@@ -4,10 +4,12 @@ import tempfile
 from pathlib import Path
 from typing import Tuple
 from src.core.services.db_base import BaseDatabaseService
+from src.core.metrics import timed_phase
 from src.config.settings import settings
 
 
 class MainHospitalDBService(BaseDatabaseService):
+    @timed_phase("create_tables")
     def create_tables(self, client_uuid: str, region: str, private_bucket_name: str) -> Tuple[bool, str]:
         env = os.environ.copy()
         env['GOOGLE_APPLICATION_CREDENTIALS'] = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', '/app/terraform-sa.json')
@@ -4,6 +4,7 @@ import tempfile
 from pathlib import Path
 from typing import Tuple
 from src.core.services.db_base import BaseDatabaseService
+from src.core.metrics import timed_phase
 from src.config.settings import settings
 
 
@@ -60,6 +61,7 @@ class SubHospitalDBService(BaseDatabaseService):
             self.cleanup_os_login_key(env, pub_key)
             self.cleanup_local_key_files(priv_key, pub_key)
     
+    @timed_phase("create_tables")
     def create_tables(self, client_uuid: str, parent_uuid: str, database_name: str, region: str, private_bucket_name: str) -> Tuple[bool, str]:
         env = os.environ.copy()
         env['GOOGLE_APPLICATION_CREDENTIALS'] = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', '/app/terraform-sa.json')
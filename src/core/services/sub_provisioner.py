@@ -0,0 +1,356 @@
+import re
+import threading
+from abc import ABC, abstractmethod
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+from google.api_core import exceptions as gcp_exceptions
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import secretmanager
+from google.cloud import storage
+from google.oauth2 import service_account
+import google.auth
+from src.config.settings import settings
+from src.core.terraform_progress import ApplyProgressTracker
+
+CLOUD_PLATFORM_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+SQL_ADMIN_URL = "https://sqladmin.googleapis.com/v1"
+
+ProgressCallback = Optional[Callable[[Dict[str, Any]], None]]
+
+
+class SubHospitalProvisioner(ABC):
+    # Creates and removes the per-tenant resources of a sub-hospital. Implementations return the
+    # same (success, outputs, error) / (success, error) shapes as TerraformService.
+    engine = ""
+
+    def __init__(self, progress_callback: ProgressCallback = None, parallelism: Optional[int] = None):
+        self.progress_callback = progress_callback
+        self.parallelism = parallelism
+        self.plan_summary: Optional[Dict[str, Any]] = None
+
+    @abstractmethod
+    def provision(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+        ...
+
+    @abstractmethod
+    def destroy(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        ...
+
+
+class TerraformSubProvisioner(SubHospitalProvisioner):
+    engine = "terraform"
+
+    def provision(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+        from src.core.terraform_service import TerraformService
+        terraform_service = TerraformService(progress_callback=self.progress_callback, parallelism=self.parallelism)
+        result = terraform_service.run_full_deployment(client_uuid, client_info)
+        self.plan_summary = terraform_service.plan_summary
+        return result
+
+    def destroy(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        from src.core.terraform_service import TerraformService
+        return TerraformService().destroy_client_infrastructure(client_uuid, client_info)
+
+
+class CloudSqlAdmin:
+    # Minimal Cloud SQL Admin v1 REST client; databases are created on the parent's instance.
+    def __init__(self, session: AuthorizedSession, project_id: str):
+        self.session = session
+        self.project_id = project_id
+
+    def _url(self, path: str) -> str:
+        return f"{SQL_ADMIN_URL}/projects/{self.project_id}/{path}"
+
+    def _wait(self, operation: Dict[str, Any]) -> None:
+        deadline = time.monotonic() + settings.sub_provisioner_timeout
+        while operation.get("status") != "DONE":
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Cloud SQL operation {operation.get('name')} timed out")
+            time.sleep(1)
+            response = self.session.get(self._url(f"operations/{operation['name']}"))
+            response.raise_for_status()
+            operation = response.json()
+        if operation.get("error"):
+            errors = operation["error"].get("errors", [])
+            raise RuntimeError("; ".join(error.get("message", str(error)) for error in errors) or str(operation["error"]))
+
+    def get_instance(self, instance: str) -> Dict[str, Any]:
+        response = self.session.get(self._url(f"instances/{instance}"))
+        response.raise_for_status()
+        return response.json()
+
+    def create_database(self, instance: str, database: str) -> None:
+        response = self.session.post(
+            self._url(f"instances/{instance}/databases"),
+            json={"name": database, "charset": "utf8mb4", "collation": "utf8mb4_unicode_ci"}
+        )
+        if response.status_code == 409:
+            return
+        response.raise_for_status()
+        self._wait(response.json())
+
+    def delete_database(self, instance: str, database: str) -> None:
+        response = self.session.delete(self._url(f"instances/{instance}/databases/{database}"))
+        if response.status_code == 404:
+            return
+        response.raise_for_status()
+        self._wait(response.json())
+
+
+class SdkSubProvisioner(SubHospitalProvisioner):
+    # Fast path: a sub-hospital only needs a database on the parent's Cloud SQL instance, a connection
+    # URI secret and two buckets. Names and settings mirror infrastructure/base/main.tf. Clients are
+    # shared across deployments; pass stand-ins to the constructor to run against local fakes.
+    engine = "sdk"
+    _clients: Dict[str, Any] = {}
+    _clients_lock = threading.Lock()
+
+    def __init__(self, progress_callback: ProgressCallback = None, parallelism: Optional[int] = None,
+                 storage_client=None, secret_client=None, sql_admin=None):
+        super().__init__(progress_callback, parallelism)
+        self._storage_client = storage_client
+        self._secret_client = secret_client
+        self._sql_admin = sql_admin
+        self._tracker = ApplyProgressTracker()
+        self._progress_lock = threading.Lock()
+
+    @classmethod
+    def _credentials(cls):
+        for path in [Path("/app") / settings.gcp_credentials_file, settings.base_dir / settings.gcp_credentials_file]:
+            if path.exists():
+                return service_account.Credentials.from_service_account_file(str(path), scopes=[CLOUD_PLATFORM_SCOPE])
+        credentials, _ = google.auth.default(scopes=[CLOUD_PLATFORM_SCOPE])
+        return credentials
+
+    @classmethod
+    def _shared_client(cls, name: str, factory: Callable[[Any], Any]) -> Any:
+        if name not in cls._clients:
+            with cls._clients_lock:
+                if name not in cls._clients:
+                    cls._clients[name] = factory(cls._credentials())
+        return cls._clients[name]
+
+    @property
+    def storage_client(self) -> storage.Client:
+        if self._storage_client is None:
+            self._storage_client = self._shared_client(
+                "storage", lambda credentials: storage.Client(project=settings.gcp_project_id, credentials=credentials)
+            )
+        return self._storage_client
+
+    @property
+    def secret_client(self) -> secretmanager.SecretManagerServiceClient:
+        if self._secret_client is None:
+            self._secret_client = self._shared_client(
+                "secretmanager", lambda credentials: secretmanager.SecretManagerServiceClient(credentials=credentials)
+            )
+        return self._secret_client
+
+    @property
+    def sql_admin(self) -> CloudSqlAdmin:
+        if self._sql_admin is None:
+            self._sql_admin = self._shared_client(
+                "sqladmin", lambda credentials: CloudSqlAdmin(AuthorizedSession(credentials), settings.gcp_project_id)
+            )
+        return self._sql_admin
+
+    @staticmethod
+    def resource_names(client_uuid: str, client_info: Dict[str, Any]) -> Dict[str, str]:
+        environment = client_info.get('environment', 'dev')
+        uuid_underscore = client_uuid.replace('-', '_')
+        parent_uuid = client_info['parent_uuid']
+        hospital_name = client_info.get('client_name', '')
+        sanitized_name = re.sub(r'[ \-./]', '_', hospital_name).lower()
+        return {
+            "instance": f"mc-cluster-{parent_uuid.replace('_', '-')}",
+            "parent_secret": f"{parent_uuid.replace('-', '_')}_DATABASE_URI",
+            "database": sanitized_name if hospital_name else f"cluster_{uuid_underscore}",
+            "secret": f"{uuid_underscore}_DATABASE_URI",
+            "private_bucket": f"{uuid_underscore}_private_{environment}",
+            "public_bucket": f"{uuid_underscore}_public_{environment}"
+        }
+
+    @staticmethod
+    def labels(client_uuid: str, client_info: Dict[str, Any], **extra: str) -> Dict[str, str]:
+        return {
+            "environment": client_info.get('environment', 'dev'),
+            "managed_by": "provisioning-api",
+            "project": settings.gcp_project_id,
+            "cluster_id": client_uuid,
+            "created_date": client_info.get('created_date') or datetime.now().strftime("%Y-%m-%d"),
+            **extra
+        }
+
+    def _report(self, address: str, event_type: str) -> None:
+        # Steps are fed to the same tracker as `terraform apply -json` events, so the progress
+        # payload (statuses planned/in_progress/completed/failed) is identical for both engines
+        resource = {"addr": address, "resource_type": address.split(".")[0]}
+        if event_type == "planned_change":
+            event = {"type": event_type, "change": {"resource": resource, "action": "create"}}
+        else:
+            event = {"type": event_type, "hook": {"resource": resource, "action": "create"}}
+        with self._progress_lock:
+            self._tracker.feed(event)
+            progress = self._tracker.to_dict()
+            # Copied under the lock: the other step threads keep updating the tracker's entries
+            progress["resources"] = [dict(resource) for resource in progress["resources"]]
+        if self.progress_callback is not None:
+            try:
+                self.progress_callback(progress)
+            except Exception:
+                pass
+
+    def _run_step(self, address: str, step: Callable[[], Any]) -> Any:
+        self._report(address, "apply_start")
+        try:
+            result = step()
+        except Exception:
+            self._report(address, "apply_errored")
+            raise
+        self._report(address, "apply_complete")
+        return result
+
+    def _create_database_and_secret(self, client_uuid: str, client_info: Dict[str, Any], names: Dict[str, str]) -> Dict[str, Any]:
+        instance = self._run_step("google_sql_database.database", lambda: (
+            self.sql_admin.create_database(names["instance"], names["database"]),
+            self.sql_admin.get_instance(names["instance"])
+        )[1])
+
+        parent_uri = self.secret_client.access_secret_version(
+            request={"name": f"projects/{settings.gcp_project_id}/secrets/{names['parent_secret']}/versions/latest"}
+        ).payload.data.decode("UTF-8")
+        connection_uri = re.sub(r"/[^/]+$", f"/{names['database']}", parent_uri)
+
+        def create_secret():
+            parent = f"projects/{settings.gcp_project_id}"
+            try:
+                self.secret_client.create_secret(request={
+                    "parent": parent,
+                    "secret_id": names["secret"],
+                    "secret": {
+                        "replication": {"automatic": {}},
+                        "labels": self.labels(client_uuid, client_info, component="database", type="connection-uri")
+                    }
+                })
+            except gcp_exceptions.AlreadyExists:
+                pass
+            self.secret_client.add_secret_version(request={
+                "parent": f"{parent}/secrets/{names['secret']}",
+                "payload": {"data": connection_uri.encode("UTF-8")}
+            })
+        self._run_step("google_secret_manager_secret.db_uri", create_secret)
+
+        private_ip = next(
+            (address["ipAddress"] for address in instance.get("ipAddresses", []) if address.get("type") == "PRIVATE"),
+            None
+        )
+        return {"db_private_ip": private_ip, "connection_uri": connection_uri}
+
+    def _create_bucket(self, client_uuid: str, client_info: Dict[str, Any], name: str, public: bool) -> None:
+        bucket = self.storage_client.bucket(name)
+        bucket.storage_class = "STANDARD"
+        bucket.iam_configuration.uniform_bucket_level_access_enabled = True
+        if public:
+            bucket.configure_website(main_page_suffix="index.html", not_found_page="404.html")
+            bucket.cors = [{"origin": ["*"], "method": ["GET", "HEAD"], "responseHeader": ["*"], "maxAgeSeconds": 3600}]
+            bucket.labels = self.labels(client_uuid, client_info, component="storage", access_type="public")
+        else:
+            bucket.iam_configuration.public_access_prevention = "enforced"
+            bucket.versioning_enabled = True
+            bucket.add_lifecycle_delete_rule(age=365, number_of_newer_versions=3, is_live=False)
+            bucket.add_lifecycle_delete_rule(days_since_noncurrent_time=30)
+            bucket.labels = self.labels(client_uuid, client_info, component="storage", access_type="private")
+        try:
+            self.storage_client.create_bucket(bucket, location=client_info.get('region', settings.gcp_region).upper())
+        except gcp_exceptions.Conflict:
+            pass
+        if public:
+            policy = bucket.get_iam_policy(requested_policy_version=3)
+            policy.bindings.append({"role": "roles/storage.objectViewer", "members": {"allUsers"}})
+            bucket.set_iam_policy(policy)
+
+    def provision(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+        if not client_info.get('parent_uuid'):
+            return False, None, "The sdk provisioner only supports sub-hospitals"
+        names = self.resource_names(client_uuid, client_info)
+        for address in ["google_sql_database.database", "google_secret_manager_secret.db_uri",
+                        "google_storage_bucket.private", "google_storage_bucket.public"]:
+            self._report(address, "planned_change")
+
+        try:
+            # The database/secret chain and both buckets are independent, so they run side by side
+            with ThreadPoolExecutor(max_workers=3, thread_name_prefix=f"sdk-{client_uuid[:8]}") as executor:
+                database_future = executor.submit(self._create_database_and_secret, client_uuid, client_info, names)
+                bucket_futures = [
+                    executor.submit(self._run_step, "google_storage_bucket.private",
+                                    lambda: self._create_bucket(client_uuid, client_info, names["private_bucket"], False)),
+                    executor.submit(self._run_step, "google_storage_bucket.public",
+                                    lambda: self._create_bucket(client_uuid, client_info, names["public_bucket"], True))
+                ]
+                database = database_future.result()
+                for future in bucket_futures:
+                    future.result()
+        except Exception as e:
+            return False, None, f"SDK provisioning failed: {str(e)}"
+
+        outputs = {
+            "db_instance_name": names["instance"],
+            "db_private_ip": database["db_private_ip"],
+            "db_port": "3306",
+            "database_name": names["database"],
+            "db_username": "root",
+            "connection_uri": database["connection_uri"],
+            "private_bucket_name": names["private_bucket"],
+            "public_bucket_name": names["public_bucket"],
+            "secret_name": names["secret"],
+            "cluster_id": client_uuid,
+            "environment": client_info.get('environment', 'dev'),
+            "deployment_region": client_info.get('region', settings.gcp_region)
+        }
+        return True, outputs, None
+
+    def destroy(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        names = self.resource_names(client_uuid, client_info)
+        errors = []
+        for bucket_name in [names["private_bucket"], names["public_bucket"]]:
+            try:
+                self.storage_client.bucket(bucket_name).delete(force=True)
+            except gcp_exceptions.NotFound:
+                pass
+            except Exception as e:
+                errors.append(f"bucket {bucket_name}: {str(e)}")
+        try:
+            self.secret_client.delete_secret(request={"name": f"projects/{settings.gcp_project_id}/secrets/{names['secret']}"})
+        except gcp_exceptions.NotFound:
+            pass
+        except Exception as e:
+            errors.append(f"secret {names['secret']}: {str(e)}")
+        try:
+            self.sql_admin.delete_database(names["instance"], names["database"])
+        except Exception as e:
+            errors.append(f"database {names['database']}: {str(e)}")
+
+        if errors:
+            return False, f"SDK destroy failed: {'; '.join(errors)}"
+        return True, None
+
+
+PROVISIONERS: Dict[str, Type[SubHospitalProvisioner]] = {
+    TerraformSubProvisioner.engine: TerraformSubProvisioner,
+    SdkSubProvisioner.engine: SdkSubProvisioner,
+}
+
+
+def register_provisioner(engine: str, provisioner_class: Type[SubHospitalProvisioner]) -> None:
+    PROVISIONERS[engine] = provisioner_class
+
+
+def get_provisioner(engine: Optional[str] = None, progress_callback: ProgressCallback = None,
+                    parallelism: Optional[int] = None) -> SubHospitalProvisioner:
+    engine = engine or settings.sub_hospital_provisioner
+    if engine not in PROVISIONERS:
+        raise ValueError(f"Unknown sub-hospital provisioner: {engine}")
+    return PROVISIONERS[engine](progress_callback=progress_callback, parallelism=parallelism)
@@ -0,0 +1,95 @@
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from google.cloud import storage
+from google.oauth2 import service_account
+from src.config.settings import settings
+
+STATE_OBJECT_NAME = "default.tfstate"
+LOCK_OBJECT_NAME = "default.tflock"
+LOCAL_STATE_FILE = "terraform.tfstate"
+LOCAL_LOCK_FILE = ".terraform.tfstate.lock.info"
+
+
+class StateBackend:
+    # Reads outputs straight from the Terraform state object instead of running `terraform output`.
+    # Layout matches generate_backend_config: gs://<state_bucket>/<uuid_underscore>/default.tfstate
+    _storage_client = None
+    _client_lock = threading.Lock()
+
+    @classmethod
+    def storage_client(cls) -> storage.Client:
+        if cls._storage_client is None:
+            with cls._client_lock:
+                if cls._storage_client is None:
+                    credentials_path = cls._credentials_path()
+                    if credentials_path is not None:
+                        credentials = service_account.Credentials.from_service_account_file(str(credentials_path))
+                        cls._storage_client = storage.Client(project=settings.gcp_project_id, credentials=credentials)
+                    else:
+                        cls._storage_client = storage.Client(project=settings.gcp_project_id)
+        return cls._storage_client
+
+    @staticmethod
+    def _credentials_path() -> Optional[Path]:
+        for path in [Path("/app") / settings.gcp_credentials_file, settings.base_dir / settings.gcp_credentials_file]:
+            if path.exists():
+                return path
+        return None
+
+    @staticmethod
+    def state_object_name(client_uuid: str) -> str:
+        return f"{client_uuid.replace('-', '_')}/{STATE_OBJECT_NAME}"
+
+    def state_exists(self, client_uuid: str) -> bool:
+        # Raises when the backend can't be reached, so callers can tell "no state" from "unknown"
+        if settings.state_backend_type == "local":
+            return (settings.deployments_base_path / client_uuid / LOCAL_STATE_FILE).exists()
+        return self.storage_client().bucket(settings.state_bucket_name).blob(self.state_object_name(client_uuid)).exists()
+
+    def release_stale_lock(self, client_uuid: str) -> bool:
+        # Only safe when no terraform process can be running for the client (e.g. at startup)
+        if settings.state_backend_type == "local":
+            lock_file = settings.deployments_base_path / client_uuid / LOCAL_LOCK_FILE
+            if not lock_file.exists():
+                return False
+            lock_file.unlink()
+            return True
+        blob = self.storage_client().bucket(settings.state_bucket_name).blob(
+            f"{client_uuid.replace('-', '_')}/{LOCK_OBJECT_NAME}"
+        )
+        if not blob.exists():
+            return False
+        blob.delete()
+        return True
+
+    def read_state(self, client_uuid: str) -> Tuple[bool, Any]:
+        try:
+            if settings.state_backend_type == "local":
+                state_path = settings.deployments_base_path / client_uuid / LOCAL_STATE_FILE
+                if not state_path.exists():
+                    return False, f"State file not found: {state_path}"
+                return True, json.loads(state_path.read_text())
+
+            blob = self.storage_client().bucket(settings.state_bucket_name).blob(self.state_object_name(client_uuid))
+            data = blob.download_as_bytes()
+            return True, json.loads(data)
+        except Exception as e:
+            return False, f"Failed to read state for {client_uuid}: {str(e)}"
+
+    @staticmethod
+    def extract_outputs(state: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            key: value['value'] if isinstance(value, dict) and 'value' in value else value
+            for key, value in state.get('outputs', {}).items()
+        }
+
+    def get_outputs(self, client_uuid: str) -> Tuple[bool, Any]:
+        success, state = self.read_state(client_uuid)
+        if not success:
+            return False, state
+        outputs = self.extract_outputs(state)
+        if not outputs:
+            return False, f"State for {client_uuid} has no outputs"
+        return True, outputs
@@ -0,0 +1,111 @@
+"""
+Incremental parser for the machine-readable output of `terraform apply -json`.
+"""
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Data source reads show up as hooks but are not part of the planned change count.
+UNCOUNTED_ACTIONS = ("read", "noop")
+
+
+class ApplyProgressTracker:
+    """Records per-resource start/complete events and timings from a JSON event stream."""
+    
+    def __init__(self):
+        self.resources: Dict[str, Dict[str, Any]] = {}
+        self.resources_total: Optional[int] = None
+        self.errors: List[str] = []
+        self.plan_changes: Dict[str, int] = {}
+        self._started: Dict[str, float] = {}
+    
+    def feed_line(self, line: str) -> Tuple[str, bool]:
+        """
+        Parse one output line.
+        
+        Returns:
+            Tuple of (human readable text for the log, whether progress changed)
+        """
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return line, False
+        if not isinstance(event, dict):
+            return line, False
+        
+        message = event.get("@message", "")
+        if event.get("type") == "diagnostic":
+            diagnostic = event.get("diagnostic") or {}
+            if diagnostic.get("detail"):
+                message = f"{message}\n{diagnostic['detail']}"
+            if diagnostic.get("severity") == "error":
+                self.errors.append(message)
+        return message + "\n", self.feed(event)
+    
+    def feed(self, event: Dict[str, Any]) -> bool:
+        event_type = event.get("type")
+        
+        if event_type == "planned_change":
+            change = event.get("change") or {}
+            address = (change.get("resource") or {}).get("addr")
+            if address and address not in self.resources:
+                self.resources[address] = self._new_resource(change.get("resource") or {}, change.get("action"), "planned")
+                return True
+            return False
+        
+        if event_type == "change_summary":
+            changes = event.get("changes") or {}
+            if changes.get("operation") == "plan":
+                self.plan_changes = {key: changes.get(key, 0) for key in ("add", "change", "remove")}
+                self.resources_total = changes.get("add", 0) + changes.get("change", 0) + changes.get("remove", 0)
+                return True
+            return False
+        
+        hook = event.get("hook") or {}
+        resource = hook.get("resource") or {}
+        address = resource.get("addr")
+        if not address:
+            return False
+        
+        if event_type == "apply_start":
+            entry = self.resources.setdefault(address, self._new_resource(resource, hook.get("action"), "planned"))
+            entry["action"] = hook.get("action") or entry["action"]
+            entry["status"] = "in_progress"
+            entry["started_at"] = datetime.utcnow().isoformat()
+            self._started[address] = time.monotonic()
+            return True
+        
+        if event_type in ("apply_complete", "apply_errored"):
+            entry = self.resources.setdefault(address, self._new_resource(resource, hook.get("action"), "planned"))
+            entry["status"] = "completed" if event_type == "apply_complete" else "failed"
+            started = self._started.pop(address, None)
+            if started is not None:
+                entry["elapsed_seconds"] = round(time.monotonic() - started, 1)
+            elif hook.get("elapsed_seconds") is not None:
+                entry["elapsed_seconds"] = float(hook["elapsed_seconds"])
+            return True
+        
+        return False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        counted = [r for r in self.resources.values() if r["action"] not in UNCOUNTED_ACTIONS]
+        resources_total = self.resources_total if self.resources_total is not None else len(counted)
+        in_progress = [r for r in self.resources.values() if r["status"] == "in_progress"]
+        return {
+            "resources_done": sum(1 for r in counted if r["status"] == "completed"),
+            "resources_total": resources_total,
+            "current_resource": in_progress[-1]["address"] if in_progress else None,
+            "resources": list(self.resources.values()),
+        }
+    
+    @staticmethod
+    def _new_resource(resource: Dict[str, Any], action: Optional[str], status: str) -> Dict[str, Any]:
+        return {
+            "address": resource.get("addr"),
+            "resource_type": resource.get("resource_type"),
+            "action": action,
+            "status": status,
+            "started_at": None,
+            "elapsed_seconds": None,
+        }
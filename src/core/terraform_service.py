@@ -1,47 +1,133 @@
+import hashlib
 import json
 import os
 import shutil
+import signal
 import subprocess
+import threading
+import time
+from collections import deque
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from src.config.settings import settings
+from src.core.terraform_progress import ApplyProgressTracker
+from src.core.state_backend import StateBackend, LOCAL_LOCK_FILE, LOCAL_STATE_FILE
+from src.core.workspace_index import workspace_index
+from src.core.metrics import observe_phase, timed_phase
+
+LOCK_FILE_NAME = ".terraform.lock.hcl"
+PLAN_FILE_NAME = "tfplan"
+TEMPLATE_HASH_MARKER = ".template_hash"
+TEMPLATE_HASH_FILE = "template.sha256"
 
 
 class TerraformService:
-    def __init__(self):
+    _lock_file_mutex = threading.Lock()
+    _snapshot_mutex = threading.Lock()
+    _snapshot_cache: Optional[Tuple[tuple, str, Path]] = None
+    _active_logs: Dict[str, Path] = {}
+    _active_logs_lock = threading.Lock()
+    
+    def __init__(self, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None, parallelism: Optional[int] = None):
         self.template_path = settings.terraform_template_path
         self.deployments_path = settings.deployments_base_path
         self.terraform_binary = settings.terraform_binary
+        self.progress_callback = progress_callback
+        self.parallelism = parallelism
+        self.progress_tracker: Optional[ApplyProgressTracker] = None
+        self.plan_summary: Optional[Dict[str, Any]] = None
+        self.state_backend = StateBackend()
         
+    @timed_phase("workspace")
     def create_client_workspace(self, client_uuid: str, client_info: Dict[str, Any]) -> Path:
         workspace_path = self.deployments_path / client_uuid
+        template_hash, snapshot_path = self.ensure_template_snapshot()
         
         if workspace_path.exists():
+            # Keep .terraform so re-runs don't re-initialize; only top-level files are replaced.
+            # Local-backend state (and its backups and lock) is the only record of what exists.
             try:
-                shutil.rmtree(workspace_path)
+                for item in workspace_path.iterdir():
+                    if self._is_local_state_file(item.name):
+                        continue
+                    if not item.is_dir() or item.is_symlink():
+                        item.unlink()
             except Exception as e:
                 raise ValueError(f"Workspace already exists for client {client_uuid} and could not be cleaned up: {e}")
         
         workspace_path.mkdir(parents=True, exist_ok=True)
         
-        for item in self.template_path.iterdir():
-            if item.is_file() and not item.name.endswith('.template'):
-                shutil.copy2(item, workspace_path)
+        for item in snapshot_path.iterdir():
+            try:
+                os.link(item, workspace_path / item.name)
+            except OSError:
+                shutil.copy2(item, workspace_path / item.name)
         
+        (workspace_path / TEMPLATE_HASH_MARKER).write_text(template_hash)
+        self.generate_tfvars(workspace_path, client_uuid, client_info)
+        self.generate_backend_config(workspace_path, client_uuid)
+        return workspace_path
+    
+    @staticmethod
+    def _is_local_state_file(name: str) -> bool:
+        return name.startswith(LOCAL_STATE_FILE) or name == LOCAL_LOCK_FILE
+    
+    def _credentials_source(self) -> Path:
         credentials_src = Path("/app") / settings.gcp_credentials_file
         if not credentials_src.exists():
             credentials_src = settings.base_dir / settings.gcp_credentials_file
+        return credentials_src
+    
+    def _snapshot_sources(self) -> List[Path]:
+        # Credentials never go into the shared, world-readable snapshot; _prepare_credentials
+        # gives each workspace its own private copy
+        return [
+            item for item in sorted(self.template_path.iterdir())
+            if item.is_file() and not item.name.endswith('.template') and item.name != settings.gcp_credentials_file
+        ]
+    
+    def ensure_template_snapshot(self) -> Tuple[str, Path]:
+        # The template is snapshotted once per content hash into an immutable directory that
+        # workspaces hardlink from. The hash is only recomputed when a source file's stat changes.
+        sources = self._snapshot_sources()
+        signature = tuple((str(item), item.stat().st_mtime_ns, item.stat().st_size) for item in sources)
         
-        if credentials_src.exists():
-            shutil.copy2(credentials_src, workspace_path / settings.gcp_credentials_file)
-        
-        self.generate_tfvars(workspace_path, client_uuid, client_info)
-        self.generate_backend_config(workspace_path, client_uuid)
-        return workspace_path
+        with self._snapshot_mutex:
+            cached = TerraformService._snapshot_cache
+            if cached is not None and cached[0] == signature and cached[2].exists():
+                return cached[1], cached[2]
+            
+            template_hash = self.compute_template_hash(sources)
+            snapshot_path = settings.template_snapshots_path / template_hash
+            
+            if not snapshot_path.exists():
+                staging_path = settings.template_snapshots_path / f".{template_hash}.{os.getpid()}.tmp"
+                if staging_path.exists():
+                    shutil.rmtree(staging_path)
+                staging_path.mkdir(parents=True)
+                for item in sources:
+                    target = staging_path / item.name
+                    shutil.copy2(item, target)
+                    target.chmod(0o444)
+                try:
+                    staging_path.rename(snapshot_path)
+                except OSError:
+                    if not snapshot_path.exists():
+                        raise
+                    shutil.rmtree(staging_path, ignore_errors=True)
+            
+            TerraformService._snapshot_cache = (signature, template_hash, snapshot_path)
+            return template_hash, snapshot_path
+    
+    def get_workspace_template_hash(self, client_uuid: str) -> Optional[str]:
+        marker = self.get_workspace_path(client_uuid) / TEMPLATE_HASH_MARKER
+        if not marker.exists():
+            return None
+        return marker.read_text().strip()
     
     def generate_tfvars(self, workspace_path: Path, client_uuid: str, client_info: Dict[str, Any]) -> None:
-        current_date = datetime.now().strftime("%Y-%m-%d")
+        current_date = client_info.get('created_date') or datetime.now().strftime("%Y-%m-%d")
         environment = client_info.get('environment', 'dev')
         is_sub_hospital = client_info.get('parent_uuid') is not None
         parent_instance_name = ""
@@ -65,6 +151,15 @@ hospital_name = "{hospital_name}"
     
     def generate_backend_config(self, workspace_path: Path, client_uuid: str) -> None:
         client_uuid_underscore = client_uuid.replace('-', '_')
+        if settings.state_backend_type == "local":
+            backend_content = f"""terraform {{
+  backend "local" {{
+    path = "{LOCAL_STATE_FILE}"
+  }}
+}}
+"""
+            (workspace_path / "backend.tf").write_text(backend_content)
+            return
         backend_content = f"""terraform {{
   backend "gcs" {{
     bucket = "{settings.state_bucket_name}"
@@ -75,77 +170,302 @@ hospital_name = "{hospital_name}"
         backend_path = workspace_path / "backend.tf"
         backend_path.write_text(backend_content)
     
-    def run_terraform_init(self, workspace_path: Path) -> Tuple[bool, str]:
-        credentials_file = workspace_path / settings.gcp_credentials_file
-        if not credentials_file.exists():
-            credentials_src = Path("/app") / settings.gcp_credentials_file
-            if not credentials_src.exists():
-                credentials_src = settings.base_dir / settings.gcp_credentials_file
-            if credentials_src.exists():
-                shutil.copy2(credentials_src, credentials_file)
-            else:
-                return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+    def compute_template_hash(self, sources: Optional[List[Path]] = None) -> str:
+        # One hash over exactly the files that go into a snapshot, shared by snapshots and the provider lock
+        digest = hashlib.sha256()
+        for item in sources if sources is not None else self._snapshot_sources():
+            digest.update(item.name.encode())
+            digest.update(b"\0")
+            digest.update(item.read_bytes())
+        return digest.hexdigest()
+    
+    def ensure_provider_lock_file(self) -> Tuple[bool, str]:
+        # Providers are resolved once from the template into the shared plugin cache;
+        # workspaces copy the pinned lock file and never run `init -upgrade` themselves.
+        lock_dir = settings.terraform_lock_dir
+        lock_file = lock_dir / LOCK_FILE_NAME
+        hash_file = lock_dir / TEMPLATE_HASH_FILE
+        
+        try:
+            template_hash = self.compute_template_hash()
+        except Exception as e:
+            return False, f"Could not hash terraform template: {str(e)}"
         
+        with self._lock_file_mutex:
+            if lock_file.exists() and hash_file.exists() and hash_file.read_text().strip() == template_hash:
+                return True, str(lock_file)
+            
+            template_changed = lock_file.exists()
+            lock_dir.mkdir(parents=True, exist_ok=True)
+            for item in lock_dir.glob("*.tf"):
+                item.unlink()
+            for item in self.template_path.iterdir():
+                if item.is_file() and item.suffix == '.tf':
+                    shutil.copy2(item, lock_dir)
+            
+            command = [self.terraform_binary, "init", "-backend=false", "-input=false", "-no-color"]
+            if template_changed and settings.terraform_upgrade_on_template_change:
+                command.append("-upgrade")
+            
+            try:
+                result = subprocess.run(
+                    command,
+                    cwd=lock_dir,
+                    capture_output=True,
+                    text=True,
+                    timeout=settings.terraform_init_timeout,
+                    env=self._terraform_env()
+                )
+                (lock_dir / "init.log").write_text(result.stdout + "\n" + result.stderr)
+                if result.returncode != 0 or not lock_file.exists():
+                    return False, result.stderr or result.stdout
+            except subprocess.TimeoutExpired:
+                return False, f"Provider lock generation timed out after {settings.terraform_init_timeout} seconds"
+            except Exception as e:
+                return False, f"Error generating provider lock file: {str(e)}"
+            
+            hash_file.write_text(template_hash)
+            return True, str(lock_file)
+    
+    def _terraform_env(self, credentials_file: Optional[Path] = None) -> Dict[str, str]:
         env = os.environ.copy()
-        env['GOOGLE_APPLICATION_CREDENTIALS'] = str(credentials_file)
+        if credentials_file is not None:
+            env['GOOGLE_APPLICATION_CREDENTIALS'] = str(credentials_file)
+        env['TF_PLUGIN_CACHE_DIR'] = str(settings.terraform_plugin_cache_dir)
+        env['TF_IN_AUTOMATION'] = "1"
+        return env
+    
+    def _run_streaming(self, command: List[str], workspace_path: Path, log_name: str, timeout: int, env: Dict[str, str],
+                       line_handler: Optional[Callable[[str], str]] = None) -> Tuple[int, str]:
+        # Output is written to the log file line by line; only a bounded tail is kept
+        # in memory for error reporting. Raises subprocess.TimeoutExpired on timeout.
+        log_path = workspace_path / log_name
+        tail = deque(maxlen=settings.terraform_log_tail_lines)
+        timed_out = threading.Event()
+        started = time.monotonic()
         
+        self._register_active_log(workspace_path, log_path)
         try:
-            result = subprocess.run(
-                [self.terraform_binary, "init", "-no-color", "-upgrade"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
-                timeout=settings.terraform_init_timeout,
-                env=env
+            with open(log_path, "w", buffering=1) as log_file:
+                process = subprocess.Popen(
+                    command,
+                    cwd=workspace_path,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    env=env,
+                    start_new_session=True
+                )
+                timer = threading.Timer(timeout, self._kill_process_group, args=(process, timed_out))
+                timer.daemon = True
+                timer.start()
+                try:
+                    for line in process.stdout:
+                        if line_handler is not None:
+                            line = line_handler(line)
+                        log_file.write(line)
+                        tail.append(line.rstrip("\n"))
+                    returncode = process.wait()
+                finally:
+                    timer.cancel()
+                    if process.poll() is None:
+                        self._kill_process_group(process)
+                        process.wait()
+        finally:
+            self._unregister_active_log(workspace_path, log_path)
+            observe_phase(Path(log_name).stem, time.monotonic() - started)
+        
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(command, timeout, output="\n".join(tail))
+        return returncode, "\n".join(tail)
+    
+    @staticmethod
+    def _kill_process_group(process, timed_out: Optional[threading.Event] = None) -> None:
+        if timed_out is not None:
+            timed_out.set()
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    
+    def _register_active_log(self, workspace_path: Path, log_path: Path) -> None:
+        with self._active_logs_lock:
+            self._active_logs[workspace_path.name] = log_path
+    
+    def _unregister_active_log(self, workspace_path: Path, log_path: Path) -> None:
+        with self._active_logs_lock:
+            if self._active_logs.get(workspace_path.name) == log_path:
+                del self._active_logs[workspace_path.name]
+    
+    def get_active_log(self, client_uuid: str) -> Optional[Path]:
+        with self._active_logs_lock:
+            return self._active_logs.get(client_uuid)
+    
+    def get_latest_log(self, client_uuid: str) -> Optional[Path]:
+        active_log = self.get_active_log(client_uuid)
+        if active_log is not None:
+            return active_log
+        workspace_path = self.get_workspace_path(client_uuid)
+        if not workspace_path.exists():
+            return None
+        logs = [log for log in workspace_path.glob("*.log") if log.is_file()]
+        if not logs:
+            return None
+        return max(logs, key=lambda log: log.stat().st_mtime)
+    
+    def _prepare_credentials(self, workspace_path: Path) -> Optional[Path]:
+        credentials_file = workspace_path / settings.gcp_credentials_file
+        credentials_src = self._credentials_source()
+        if not credentials_src.exists():
+            return credentials_file if credentials_file.exists() else None
+        key = credentials_src.read_bytes()
+        # Rewritten when the key was rotated, or when it is still a hardlink into an older snapshot
+        if credentials_file.exists() and credentials_file.stat().st_nlink == 1 and credentials_file.read_bytes() == key:
+            return credentials_file
+        credentials_file.unlink(missing_ok=True)
+        with os.fdopen(os.open(credentials_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as key_file:
+            key_file.write(key)
+        return credentials_file
+    
+    def _ensure_workspace_lock_file(self, workspace_path: Path) -> None:
+        lock_file = workspace_path / LOCK_FILE_NAME
+        if not lock_file.exists():
+            lock_ok, shared_lock_file = self.ensure_provider_lock_file()
+            if lock_ok:
+                shutil.copy2(shared_lock_file, lock_file)
+    
+    def _init_command(self) -> List[str]:
+        return [self.terraform_binary, "init", "-no-color", "-input=false"]
+    
+    def _parallelism_args(self) -> List[str]:
+        return [f"-parallelism={self.parallelism}"] if self.parallelism else []
+    
+    def _plan_command(self) -> List[str]:
+        return [self.terraform_binary, "plan", "-input=false", "-no-color", "-json",
+                "-detailed-exitcode", f"-out={PLAN_FILE_NAME}", *self._parallelism_args()]
+    
+    def _apply_command(self, plan_file: Optional[str] = None) -> List[str]:
+        command = [self.terraform_binary, "apply", "-auto-approve", "-no-color", "-json", *self._parallelism_args()]
+        if plan_file:
+            command.append(plan_file)
+        return command
+    
+    def _destroy_command(self) -> List[str]:
+        return [self.terraform_binary, "destroy", "-auto-approve", "-no-color"]
+    
+    def _plan_result(self, returncode: int, output: str) -> Tuple[bool, str]:
+        # -detailed-exitcode: 0 = no changes, 1 = error, 2 = changes present
+        if returncode not in (0, 2):
+            if self.progress_tracker.errors:
+                output = "\n".join(self.progress_tracker.errors)
+            return False, output
+        
+        changes = self.progress_tracker.plan_changes
+        self.plan_summary = {
+            "add": changes.get("add", 0),
+            "change": changes.get("change", 0),
+            "destroy": changes.get("remove", 0),
+            "has_changes": returncode == 2,
+            "planned_at": datetime.utcnow().isoformat()
+        }
+        return True, output
+    
+    def _apply_result(self, returncode: int, output: str) -> Tuple[bool, str]:
+        if returncode != 0 and self.progress_tracker.errors:
+            output = "\n".join(self.progress_tracker.errors)
+        return returncode == 0, output
+    
+    def run_terraform_init(self, workspace_path: Path) -> Tuple[bool, str]:
+        credentials_file = self._prepare_credentials(workspace_path)
+        if credentials_file is None:
+            return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+        
+        self._ensure_workspace_lock_file(workspace_path)
+        env = self._terraform_env(credentials_file)
+        
+        try:
+            returncode, output = self._run_streaming(
+                self._init_command(),
+                workspace_path,
+                "init.log",
+                settings.terraform_init_timeout,
+                env
             )
-            log_path = workspace_path / "init.log"
-            log_path.write_text(result.stdout + "\n" + result.stderr)
-            
-            if result.returncode == 0:
-                return True, result.stdout
-            else:
-                return False, result.stderr or result.stdout
+            return returncode == 0, output
         except subprocess.TimeoutExpired:
             return False, f"Terraform init timed out after {settings.terraform_init_timeout} seconds"
         except Exception as e:
             return False, f"Error running terraform init: {str(e)}"
     
-    def run_terraform_apply(self, workspace_path: Path) -> Tuple[bool, str]:
-        credentials_file = workspace_path / settings.gcp_credentials_file
-        if not credentials_file.exists():
-            credentials_src = Path("/app") / settings.gcp_credentials_file
-            if not credentials_src.exists():
-                credentials_src = settings.base_dir / settings.gcp_credentials_file
-            if credentials_src.exists():
-                shutil.copy2(credentials_src, credentials_file)
-            else:
-                return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+    def run_terraform_plan(self, workspace_path: Path) -> Tuple[bool, str]:
+        credentials_file = self._prepare_credentials(workspace_path)
+        if credentials_file is None:
+            return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
         
-        env = os.environ.copy()
-        env['GOOGLE_APPLICATION_CREDENTIALS'] = str(credentials_file)
+        env = self._terraform_env(credentials_file)
+        (workspace_path / PLAN_FILE_NAME).unlink(missing_ok=True)
         
         try:
-            result = subprocess.run(
-                [self.terraform_binary, "apply", "-auto-approve", "-no-color"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
-                timeout=settings.terraform_apply_timeout,
-                env=env
+            self.progress_tracker = ApplyProgressTracker()
+            returncode, output = self._run_streaming(
+                self._plan_command(),
+                workspace_path,
+                "plan.log",
+                settings.terraform_apply_timeout,
+                env,
+                line_handler=self._track_progress
             )
-            log_path = workspace_path / "apply.log"
-            log_path.write_text(result.stdout + "\n" + result.stderr)
-            
-            if result.returncode == 0:
-                return True, result.stdout
-            else:
-                return False, result.stderr
+            return self._plan_result(returncode, output)
+        except subprocess.TimeoutExpired:
+            return False, f"Terraform plan timed out after {settings.terraform_apply_timeout} seconds"
+        except Exception as e:
+            return False, f"Error running terraform plan: {str(e)}"
+    
+    def run_terraform_apply(self, workspace_path: Path, plan_file: Optional[str] = None) -> Tuple[bool, str]:
+        credentials_file = self._prepare_credentials(workspace_path)
+        if credentials_file is None:
+            return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+        
+        env = self._terraform_env(credentials_file)
+        
+        try:
+            if not plan_file or self.progress_tracker is None:
+                self.progress_tracker = ApplyProgressTracker()
+            returncode, output = self._run_streaming(
+                self._apply_command(plan_file),
+                workspace_path,
+                "apply.log",
+                settings.terraform_apply_timeout,
+                env,
+                line_handler=self._track_progress
+            )
+            return self._apply_result(returncode, output)
         except subprocess.TimeoutExpired:
             return False, f"Terraform apply timed out after {settings.terraform_apply_timeout} seconds"
         except Exception as e:
             return False, f"Error running terraform apply: {str(e)}"
     
+    def _track_progress(self, line: str) -> str:
+        message, changed = self.progress_tracker.feed_line(line)
+        if changed and self.progress_callback is not None:
+            try:
+                self.progress_callback(self.progress_tracker.to_dict())
+            except Exception:
+                pass
+        return message
+    
+    @timed_phase("outputs")
     def get_terraform_outputs(self, workspace_path: Path) -> Optional[Dict[str, Any]]:
+        # Outputs are read from the state object written by the apply; `terraform output` is
+        # only the fallback when the state can't be fetched directly.
+        success, outputs = self.state_backend.get_outputs(workspace_path.name)
+        if success:
+            return outputs
+        return self._read_outputs_via_cli(workspace_path)
+    
+    def _read_outputs_via_cli(self, workspace_path: Path) -> Optional[Dict[str, Any]]:
         credentials_file = workspace_path / settings.gcp_credentials_file
         if credentials_file.exists():
             env = os.environ.copy()
@@ -177,12 +497,23 @@ hospital_name = "{hospital_name}"
             return None
     
     def run_full_deployment(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
+        with workspace_index.in_use(client_uuid):
+            return self._run_full_deployment(client_uuid, client_info)
+    
+    def _run_full_deployment(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
         try:
             workspace_path = self.create_client_workspace(client_uuid, client_info)
             success, output = self.run_terraform_init(workspace_path)
             if not success:
                 return False, None, f"Terraform init failed: {output}"
-            success, output = self.run_terraform_apply(workspace_path)
+            if settings.terraform_plan_before_apply:
+                success, output = self.run_terraform_plan(workspace_path)
+                if not success:
+                    return False, None, f"Terraform plan failed: {output}"
+                if self.plan_summary["has_changes"]:
+                    success, output = self.run_terraform_apply(workspace_path, plan_file=PLAN_FILE_NAME)
+            else:
+                success, output = self.run_terraform_apply(workspace_path)
             if not success:
                 return False, None, f"Terraform apply failed: {output}"
             outputs = self.get_terraform_outputs(workspace_path)
@@ -193,8 +524,14 @@ hospital_name = "{hospital_name}"
             return False, None, f"Deployment failed: {str(e)}"
     
     def workspace_exists(self, client_uuid: str) -> bool:
+        # An evicted workspace still exists as far as callers are concerned; it is rebuilt on use
         workspace_path = self.deployments_path / client_uuid
-        return workspace_path.exists()
+        return workspace_path.exists() or workspace_index.is_evicted(client_uuid)
+    
+    def rehydrate_workspace(self, client_uuid: str, client_info: Dict[str, Any]) -> Tuple[bool, str]:
+        # Rebuilds an evicted workspace from the template; init reattaches it to the state in the backend
+        workspace_path = self.create_client_workspace(client_uuid, client_info)
+        return self.run_terraform_init(workspace_path)
     
     def get_workspace_path(self, client_uuid: str) -> Path:
         return self.deployments_path / client_uuid
@@ -203,46 +540,39 @@ hospital_name = "{hospital_name}"
         if not workspace_path.exists():
             return False, "Workspace not found"
         
-        credentials_file = workspace_path / settings.gcp_credentials_file
-        if not credentials_file.exists():
-            credentials_src = Path("/app") / settings.gcp_credentials_file
-            if not credentials_src.exists():
-                credentials_src = settings.base_dir / settings.gcp_credentials_file
-            if credentials_src.exists():
-                shutil.copy2(credentials_src, credentials_file)
-            else:
-                return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
+        credentials_file = self._prepare_credentials(workspace_path)
+        if credentials_file is None:
+            return False, f"GCP credentials file not found: {settings.gcp_credentials_file}"
         
-        env = os.environ.copy()
-        env['GOOGLE_APPLICATION_CREDENTIALS'] = str(credentials_file)
+        env = self._terraform_env(credentials_file)
         
         try:
-            result = subprocess.run(
-                [self.terraform_binary, "destroy", "-auto-approve", "-no-color"],
-                cwd=workspace_path,
-                capture_output=True,
-                text=True,
-                timeout=settings.terraform_apply_timeout,
-                env=env
+            returncode, output = self._run_streaming(
+                self._destroy_command(),
+                workspace_path,
+                "destroy.log",
+                settings.terraform_apply_timeout,
+                env
             )
-            log_path = workspace_path / "destroy.log"
-            log_path.write_text(result.stdout + "\n" + result.stderr)
-            
-            if result.returncode == 0:
-                return True, result.stdout
-            else:
-                return False, result.stderr
+            return returncode == 0, output
         except subprocess.TimeoutExpired:
             return False, f"Terraform destroy timed out after {settings.terraform_apply_timeout} seconds"
         except Exception as e:
             return False, f"Error running terraform destroy: {str(e)}"
     
-    def destroy_client_infrastructure(self, client_uuid: str) -> Tuple[bool, Optional[str]]:
-        workspace_path = self.get_workspace_path(client_uuid)
-        if not workspace_path.exists():
-            return True, None
-        success, output = self.run_terraform_destroy(workspace_path)
-        if success:
-            return True, None
-        else:
-            return False, f"Terraform destroy failed: {output}"
+    def destroy_client_infrastructure(self, client_uuid: str, client_info: Optional[Dict[str, Any]] = None) -> Tuple[bool, Optional[str]]:
+        with workspace_index.in_use(client_uuid):
+            workspace_path = self.get_workspace_path(client_uuid)
+            if not workspace_path.exists():
+                if not workspace_index.is_evicted(client_uuid):
+                    return True, None
+                if client_info is None:
+                    return False, "Workspace was evicted and cannot be rebuilt without client info"
+                success, output = self.rehydrate_workspace(client_uuid, client_info)
+                if not success:
+                    return False, f"Failed to rebuild evicted workspace: {output}"
+            success, output = self.run_terraform_destroy(workspace_path)
+            if success:
+                return True, None
+            else:
+                return False, f"Terraform destroy failed: {output}"
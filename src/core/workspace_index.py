@@ -0,0 +1,229 @@
+import logging
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List
+from src.core.database import SessionLocal, Client, ClientStatusEnum, Workspace
+from src.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class WorkspaceIndex:
+    # Tracks the size and last use of every workspace under deployments_base_path and evicts the least
+    # recently used completed ones once the total exceeds workspace_disk_budget_mb. State lives in the
+    # remote backend, so TerraformService rebuilds an evicted workspace from the template when it is needed.
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._users: Dict[str, int] = {}
+        self._evicting: set = set()
+        self.last_evicted: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def measure(path: Path) -> int:
+        # Symlinks (plugin cache) are not followed and hardlinks into the template snapshot are shared,
+        # so only files owned by this workspace count.
+        total = 0
+        stack = [path]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        stat = entry.stat(follow_symlinks=False)
+                        if stat.st_nlink == 1:
+                            total += stat.st_size
+                except OSError:
+                    continue
+        return total
+
+    def acquire(self, client_uuid: str) -> None:
+        # Marks a workspace in use so it is not evicted under a running terraform command
+        with self._cond:
+            while client_uuid in self._evicting:
+                self._cond.wait()
+            self._users[client_uuid] = self._users.get(client_uuid, 0) + 1
+
+    def release(self, client_uuid: str) -> None:
+        with self._cond:
+            remaining = self._users.get(client_uuid, 1) - 1
+            if remaining > 0:
+                self._users[client_uuid] = remaining
+            else:
+                self._users.pop(client_uuid, None)
+        self.touch(client_uuid)
+
+    @contextmanager
+    def in_use(self, client_uuid: str):
+        self.acquire(client_uuid)
+        try:
+            yield
+        finally:
+            self.release(client_uuid)
+
+    def in_use_uuids(self) -> List[str]:
+        with self._cond:
+            return list(self._users)
+
+    def touch(self, client_uuid: str) -> None:
+        workspace_path = settings.deployments_base_path / client_uuid
+        if not workspace_path.exists():
+            return
+        size = self.measure(workspace_path)
+        db = SessionLocal()
+        try:
+            entry = db.query(Workspace).filter(Workspace.client_uuid == client_uuid).first()
+            if entry is None:
+                entry = Workspace(client_uuid=client_uuid)
+                db.add(entry)
+            entry.size_bytes = size
+            entry.last_accessed_at = datetime.utcnow()
+            entry.evicted_at = None
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not update workspace index for {client_uuid}: {e}")
+        finally:
+            db.close()
+
+    def is_evicted(self, client_uuid: str) -> bool:
+        db = SessionLocal()
+        try:
+            entry = db.query(Workspace).filter(Workspace.client_uuid == client_uuid).first()
+            return entry is not None and entry.evicted_at is not None
+        finally:
+            db.close()
+
+    def refresh(self) -> None:
+        # Indexes workspaces created before the index existed and drops entries whose directory or client is gone
+        base_path = settings.deployments_base_path
+        on_disk = {item.name: item for item in base_path.iterdir() if item.is_dir()} if base_path.exists() else {}
+        db = SessionLocal()
+        try:
+            entries = {entry.client_uuid: entry for entry in db.query(Workspace).all()}
+            client_uuids = {row[0] for row in db.query(Client.uuid).all()}
+            for client_uuid, entry in entries.items():
+                if client_uuid in on_disk:
+                    continue
+                if entry.evicted_at is None or client_uuid not in client_uuids:
+                    db.delete(entry)
+            for client_uuid, workspace_path in on_disk.items():
+                if client_uuid.startswith(".") or client_uuid in entries:
+                    continue
+                db.add(Workspace(
+                    client_uuid=client_uuid,
+                    size_bytes=self.measure(workspace_path),
+                    last_accessed_at=datetime.utcfromtimestamp(workspace_path.stat().st_mtime)
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+    def evict(self, client_uuid: str) -> bool:
+        with self._cond:
+            if self._users.get(client_uuid) or client_uuid in self._evicting:
+                return False
+            self._evicting.add(client_uuid)
+        db = SessionLocal()
+        try:
+            # Re-check under the eviction mark: the client may have been re-queued since candidates were picked
+            client = db.query(Client).filter(Client.uuid == client_uuid).first()
+            if client is not None and client.status != ClientStatusEnum.COMPLETED:
+                return False
+            workspace_path = settings.deployments_base_path / client_uuid
+            if workspace_path.exists():
+                shutil.rmtree(workspace_path)
+            entry = db.query(Workspace).filter(Workspace.client_uuid == client_uuid).first()
+            if entry is not None:
+                if client is None:
+                    db.delete(entry)
+                else:
+                    entry.evicted_at = datetime.utcnow()
+                db.commit()
+            return True
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not evict workspace {client_uuid}: {e}")
+            return False
+        finally:
+            db.close()
+            with self._cond:
+                self._evicting.discard(client_uuid)
+                self._cond.notify_all()
+
+    def enforce_budget(self) -> List[str]:
+        if settings.workspace_disk_budget_mb <= 0:
+            return []
+        if settings.state_backend_type == "local":
+            # Local state lives inside the workspace; removing it would lose the state
+            return []
+
+        budget = settings.workspace_disk_budget_mb * MB
+        idle_before = datetime.utcnow() - timedelta(minutes=settings.workspace_eviction_min_idle_minutes)
+        db = SessionLocal()
+        try:
+            resident = db.query(Workspace).filter(Workspace.evicted_at.is_(None))
+            total = sum(entry.size_bytes for entry in resident)
+            if total <= budget:
+                return []
+            # Completed clients, and workspaces left behind by deleted clients, oldest first
+            candidates = db.query(Workspace.client_uuid, Workspace.size_bytes).outerjoin(
+                Client, Client.uuid == Workspace.client_uuid
+            ).filter(
+                Workspace.evicted_at.is_(None),
+                Workspace.last_accessed_at < idle_before,
+                (Client.uuid.is_(None)) | (Client.status == ClientStatusEnum.COMPLETED)
+            ).order_by(Workspace.last_accessed_at).all()
+        finally:
+            db.close()
+
+        evicted = []
+        for client_uuid, size_bytes in candidates:
+            if total <= budget:
+                break
+            if self.evict(client_uuid):
+                total -= size_bytes
+                evicted.append(client_uuid)
+        if evicted:
+            evicted_at = datetime.utcnow().isoformat()
+            self.last_evicted = [{"client_uuid": client_uuid, "evicted_at": evicted_at} for client_uuid in evicted[-20:]]
+            logger.warning(f"Evicted {len(evicted)} workspaces to stay under {settings.workspace_disk_budget_mb} MB")
+        elif total > budget:
+            logger.warning(f"Workspaces use {total // MB} MB, over the {settings.workspace_disk_budget_mb} MB budget, but none can be evicted")
+        return evicted
+
+    def refresh_and_enforce(self) -> None:
+        try:
+            self.refresh()
+            self.enforce_budget()
+        except Exception:
+            logger.exception("Workspace index refresh failed")
+
+    def summary(self) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            entries = db.query(Workspace).all()
+            resident = [entry for entry in entries if entry.evicted_at is None]
+            return {
+                "budget_mb": settings.workspace_disk_budget_mb,
+                "used_mb": round(sum(entry.size_bytes for entry in resident) / MB, 1),
+                "resident": len(resident),
+                "evicted": len(entries) - len(resident),
+                "in_use": sorted(self.in_use_uuids()),
+                "last_evicted": self.last_evicted
+            }
+        finally:
+            db.close()
+
+
+workspace_index = WorkspaceIndex()
@@ -2,7 +2,7 @@
 Pydantic models for API requests and responses.
 """
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from enum import Enum
 from pydantic import BaseModel, Field, UUID4
 
@@ -10,6 +10,7 @@ from pydantic import BaseModel, Field, UUID4
 class ClientStatus(str, Enum):
     """Client deployment status."""
     PENDING = "pending"
+    QUEUED = "queued"
     IN_PROGRESS = "in_progress"
     COMPLETED = "completed"
     FAILED = "failed"
@@ -55,6 +56,36 @@ class ClientRegistrationResponse(BaseModel):
         }
 
 
+class BatchRegistrationRequest(BaseModel):
+    """Request model for registering many hospitals and sub-hospitals at once."""
+    clients: List[ClientRegistrationRequest] = Field(
+        ..., min_length=1, max_length=500,
+        description="Hospitals to register. Sub-hospitals set parent_uuid to an existing hospital or to a hospital in the same batch"
+    )
+
+
+class BatchRegistrationItem(ClientRegistrationResponse):
+    """Per-item result of a batch registration."""
+    parent_uuid: Optional[str] = None
+
+
+class BatchRegistrationResponse(BaseModel):
+    """Response model after batch registration."""
+    batch_id: str
+    status_url: str
+    total: int
+    items: List[BatchRegistrationItem]
+
+
+class BatchStatusResponse(BaseModel):
+    """Aggregated deployment status of a registration batch."""
+    batch_id: str
+    status: str = Field(description="in_progress until every item is completed or failed, then completed or failed")
+    total: int
+    counts: Dict[str, int]
+    items: List[BatchRegistrationItem]
+
+
 class TerraformOutputs(BaseModel):
     """Terraform deployment outputs."""
     db_instance_name: Optional[str] = None
@@ -71,6 +102,33 @@ class TerraformOutputs(BaseModel):
     deployment_region: Optional[str] = None
 
 
+class ResourceProgress(BaseModel):
+    """Apply progress of a single Terraform resource."""
+    address: str
+    resource_type: Optional[str] = None
+    action: Optional[str] = None
+    status: str
+    started_at: Optional[datetime] = None
+    elapsed_seconds: Optional[float] = None
+
+
+class DeploymentProgress(BaseModel):
+    """Per-resource progress of a Terraform apply."""
+    resources_done: int = 0
+    resources_total: int = 0
+    current_resource: Optional[str] = None
+    resources: list[ResourceProgress] = []
+
+
+class PlanSummary(BaseModel):
+    """Change counts of the last saved Terraform plan."""
+    add: int = 0
+    change: int = 0
+    destroy: int = 0
+    has_changes: bool = True
+    planned_at: Optional[datetime] = None
+
+
 class ClientStatusResponse(BaseModel):
     """Response model for client status query."""
     client_uuid: str
@@ -82,6 +140,9 @@ class ClientStatusResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     error_message: Optional[str] = None
+    queue_position: Optional[int] = Field(default=None, description="Position in the deployment queue while status is 'queued'")
+    progress: Optional[DeploymentProgress] = None
+    plan_summary: Optional[PlanSummary] = None
     terraform_outputs: Optional[TerraformOutputs] = None
     
     class Config:
@@ -107,6 +168,28 @@ class ClientStatusResponse(BaseModel):
         }
 
 
+class DeletionStep(BaseModel):
+    """Destroy progress of a single client within a deletion job."""
+    client_uuid: str
+    client_name: str
+    status: str = Field(description="pending, destroying, destroyed, deleted (destroy failed on an already failed client), failed or skipped")
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class DeletionJobResponse(BaseModel):
+    """Status of a background cascade delete."""
+    job_id: str
+    client_uuid: str
+    status: str = Field(description="pending, running, completed or failed")
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error_message: Optional[str] = None
+    sub_hospitals: list[DeletionStep] = []
+    parent: DeletionStep
+
+
 class ClientListItem(BaseModel):
     """Model for client in list response."""
     client_uuid: str
@@ -122,6 +205,7 @@ class ClientListResponse(BaseModel):
     """Response model for client list."""
     clients: list[ClientListItem]
     total: int
+    next_cursor: Optional[str] = None
     
     class Config:
         json_schema_extra = {
@@ -136,7 +220,8 @@ class ClientListResponse(BaseModel):
                         "created_at": "2025-11-25T10:30:00Z"
                     }
                 ],
-                "total": 1
+                "total": 1,
+                "next_cursor": None
             }
         }
 
@@ -0,0 +1,11 @@
+import os
+import tempfile
+from pathlib import Path
+
+# src.core.database builds its engines from settings at import time, so the test database
+# has to be configured before any test module imports the app
+_tmp = Path(tempfile.mkdtemp(prefix="mc-tests-"))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_tmp / 'clients.db'}")
+os.environ.setdefault("DEPLOYMENTS_BASE_PATH", str(_tmp / "deployments"))
+os.environ.setdefault("TEMPLATE_SNAPSHOTS_PATH", str(_tmp / "templates"))
+os.environ.setdefault("TERRAFORM_TEMPLATE_PATH", str(Path(__file__).resolve().parent.parent / "infrastructure" / "base"))
@@ -0,0 +1,80 @@
+import uuid
+from concurrent.futures import Future
+
+import pytest
+
+from src.core.background_tasks import task_manager
+from src.core.client_service import ClientService
+from src.core.database import ClientStatusEnum, SessionLocal, init_db
+from src.models.models import ClientRegistrationRequest
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def parent_with_dependent(db):
+    parent_uuid, sub_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+    ClientService.create_client(db, ClientRegistrationRequest(client_name="Parent Hospital", client_uuid=parent_uuid))
+    ClientService.create_client(db, ClientRegistrationRequest(client_name="Branch", client_uuid=sub_uuid, parent_uuid=parent_uuid))
+    dependents = [(sub_uuid, {"client_name": "Branch"})]
+    with task_manager._lock:
+        task_manager._dependents[parent_uuid] = dependents
+    yield parent_uuid, sub_uuid, dependents
+    with task_manager._lock:
+        task_manager._dependents.pop(parent_uuid, None)
+        task_manager._futures.pop(parent_uuid, None)
+        task_manager._running.discard(parent_uuid)
+
+
+def test_cancel_running_parent_keeps_dependents(db, parent_with_dependent):
+    parent_uuid, sub_uuid, dependents = parent_with_dependent
+    with task_manager._lock:
+        task_manager._futures[parent_uuid] = Future()
+        task_manager._running.add(parent_uuid)
+
+    assert task_manager.cancel(parent_uuid) is False
+
+    assert task_manager._dependents[parent_uuid] == dependents
+    assert task_manager.is_waiting(sub_uuid)
+    db.expire_all()
+    assert ClientService.get_client_by_uuid(db, sub_uuid).status == ClientStatusEnum.PENDING
+
+
+def test_cancel_queued_parent_fails_dependents(db, parent_with_dependent):
+    parent_uuid, sub_uuid, _ = parent_with_dependent
+    with task_manager._lock:
+        task_manager._futures[parent_uuid] = Future()
+
+    assert task_manager.cancel(parent_uuid) is True
+
+    assert parent_uuid not in task_manager._dependents
+    assert not task_manager.is_waiting(sub_uuid)
+    db.expire_all()
+    sub_hospital = ClientService.get_client_by_uuid(db, sub_uuid)
+    assert sub_hospital.status == ClientStatusEnum.FAILED
+    assert sub_hospital.error_message == "Parent hospital deployment cancelled"
+
+
+def test_cancel_unless_running_rejects_without_cancelling(db, parent_with_dependent):
+    parent_uuid, sub_uuid, dependents = parent_with_dependent
+    future = Future()
+    with task_manager._lock:
+        task_manager._futures[parent_uuid] = future
+        task_manager._running.add(sub_uuid)
+    try:
+        cancelled, error_message = task_manager.cancel_unless_running([parent_uuid, sub_uuid])
+    finally:
+        with task_manager._lock:
+            task_manager._running.discard(sub_uuid)
+
+    assert cancelled is False
+    assert sub_uuid in error_message
+    assert not future.cancelled()
+    assert task_manager._futures[parent_uuid] is future
+    assert task_manager._dependents[parent_uuid] == dependents
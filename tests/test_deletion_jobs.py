@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+
+from src.core.database import Client, ClientStatusEnum
+from src.core.deletion_jobs import DeletionJobManager
+
+
+def _client(client_uuid, parent_uuid=None):
+    return Client(uuid=client_uuid, client_name=client_uuid, parent_uuid=parent_uuid, status=ClientStatusEnum.COMPLETED,
+                  environment="dev", region="me-central2")
+
+
+def test_jobs_claim_every_client_they_cover(monkeypatch):
+    async def scenario():
+        release = asyncio.Event()
+
+        async def run(job, original_status, engines):
+            await release.wait()
+
+        manager = DeletionJobManager()
+        monkeypatch.setattr(manager, "_run", run)
+        parent, sub_hospital = _client("parent"), _client("sub", "parent")
+        job = manager.start(parent, [sub_hospital])
+
+        assert manager.active_job("parent") == job["job_id"]
+        assert manager.active_job("sub") == job["job_id"]
+        with pytest.raises(ValueError, match="sub"):
+            manager.start(sub_hospital, [])
+        release.set()
+        await asyncio.gather(*manager._tasks.values())
+
+    asyncio.run(scenario())
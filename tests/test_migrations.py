@@ -0,0 +1,34 @@
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import text
+
+from src.core.database import engine, init_db
+from src.core.migrations import _clear_legacy_outputs, _client_outputs
+
+
+def _insert_client(conn, client_uuid, outputs_json):
+    conn.execute(text(
+        "INSERT INTO clients (uuid, client_name, job_id, status, environment, region, resume_attempts, terraform_outputs, created_at, updated_at) "
+        "VALUES (:uuid, 'Legacy Hospital', :job_id, 'COMPLETED', 'dev', 'me-central2', 0, :outputs, :now, :now)"
+    ), {"uuid": client_uuid, "job_id": f"job-{client_uuid}", "outputs": outputs_json, "now": datetime.utcnow()})
+
+
+def _legacy_outputs(conn, client_uuid):
+    return conn.execute(text("SELECT terraform_outputs FROM clients WHERE uuid = :uuid"), {"uuid": client_uuid}).scalar()
+
+
+def test_legacy_outputs_are_cleared_after_backfill():
+    init_db()
+    migrated, unreadable = str(uuid.uuid4()), str(uuid.uuid4())
+    with engine.begin() as conn:
+        _insert_client(conn, migrated, json.dumps({"database_name": "legacy_db", "db_port": 3306}))
+        _insert_client(conn, unreadable, "not json")
+        _client_outputs(conn)
+        _clear_legacy_outputs(conn)
+
+        assert _legacy_outputs(conn, migrated) is None
+        assert _legacy_outputs(conn, unreadable) == "not json"
+        row = conn.execute(text("SELECT database_name, db_port FROM client_outputs WHERE client_uuid = :uuid"), {"uuid": migrated}).one()
+        assert tuple(row) == ("legacy_db", "3306")
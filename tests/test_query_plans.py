@@ -0,0 +1,49 @@
+from datetime import datetime
+
+import pytest
+
+from src.core.client_service import ClientService
+from src.core.database import Client, ClientStatusEnum, SessionLocal, init_db
+from src.core.migrations import MIGRATIONS, current_version, explain_query_plan, hot_query_plans, uses_index
+
+
+@pytest.fixture(scope="module")
+def db():
+    init_db()
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def test_migrations_reach_latest_version(db):
+    assert current_version(db.get_bind()) == MIGRATIONS[-1][0]
+
+
+@pytest.mark.parametrize("cursor", [None, ClientService.encode_list_cursor(datetime(2025, 1, 1), "7f54752e-4b12-4746-8893-afabc3e2af29")])
+def test_list_page_uses_created_at_uuid_index(db, cursor):
+    plan = explain_query_plan(db, ClientService.list_page_statement(100, cursor))
+    assert uses_index(plan, "ix_clients_created_at_uuid"), plan
+
+
+def test_sub_hospitals_use_parent_index(db):
+    query = db.query(Client).filter(Client.parent_uuid == "parent").order_by(Client.created_at.desc())
+    plan = explain_query_plan(db, query)
+    assert uses_index(plan, "ix_clients_parent_uuid_created_at"), plan
+
+
+def test_status_filter_uses_status_index(db):
+    query = db.query(Client).filter(Client.status == ClientStatusEnum.IN_PROGRESS).order_by(Client.created_at)
+    plan = explain_query_plan(db, query)
+    assert uses_index(plan, "ix_clients_status_created_at"), plan
+
+
+@pytest.mark.parametrize("name, index", [
+    ("list_clients_page", "ix_clients_created_at_uuid"),
+    ("list_clients_page_cursor", "ix_clients_created_at_uuid"),
+    ("get_sub_hospitals", "ix_clients_parent_uuid_created_at"),
+    ("reconcile", "ix_clients_status_created_at"),
+    ("get_batch_clients", "ix_clients_batch_id"),
+])
+def test_hot_query_plans_use_their_indexes(db, name, index):
+    plan = hot_query_plans(db)[name]
+    assert uses_index(plan, index), plan
@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+
+from src.config.settings import settings
+from src.core.state_backend import LOCAL_LOCK_FILE, LOCAL_STATE_FILE
+from src.core.terraform_service import TerraformService
+
+CLIENT_INFO = {"client_name": "City General Hospital", "environment": "dev", "region": "me-central2"}
+
+
+@pytest.fixture
+def local_backend(monkeypatch):
+    monkeypatch.setattr(settings, "state_backend_type", "local")
+
+
+def test_recreating_workspace_keeps_local_state(local_backend):
+    service = TerraformService()
+    client_uuid = str(uuid.uuid4())
+    workspace_path = service.create_client_workspace(client_uuid, CLIENT_INFO)
+    state_files = {
+        LOCAL_STATE_FILE: '{"version": 4, "serial": 3}',
+        f"{LOCAL_STATE_FILE}.backup": '{"version": 4, "serial": 2}',
+        LOCAL_LOCK_FILE: '{"ID": "lock"}',
+    }
+    for name, content in state_files.items():
+        (workspace_path / name).write_text(content)
+    (workspace_path / "terraform.tfvars").write_text("stale")
+
+    service.create_client_workspace(client_uuid, CLIENT_INFO)
+
+    for name, content in state_files.items():
+        assert (workspace_path / name).read_text() == content
+    assert (workspace_path / "terraform.tfvars").read_text() != "stale"
+    assert 'backend "local"' in (workspace_path / "backend.tf").read_text()
+
+
+def test_snapshot_is_keyed_by_template_hash():
+    service = TerraformService()
+    template_hash, snapshot_path = service.ensure_template_snapshot()
+    assert template_hash == service.compute_template_hash() == snapshot_path.name
+    assert sorted(item.name for item in snapshot_path.iterdir()) == [item.name for item in service._snapshot_sources()]